@@ -13,7 +13,7 @@ SECRET_KEY = config('SECRET_KEY', default='your-secret-key-here')
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = config('DEBUG', default=True, cast=bool)
 
-ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='localhost,127.0.0.1', cast=lambda v: [s.strip() for s in v.split(',')])
+ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='localhost,127.0.0.1', cast=lambda v: tuple(s.strip() for s in v.split(',') if s.strip()))
 
 # Application definition
 DJANGO_APPS = [
@@ -54,7 +54,6 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -62,6 +61,13 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Parse each template once per process (replaces APP_DIRS)
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -73,6 +79,17 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            # WAL lets admin reads proceed while analyses are being written
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA cache_size=-64000;'
+                'PRAGMA temp_store=MEMORY;'
+            ),
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
@@ -131,30 +148,33 @@ REST_FRAMEWORK = {
         'rest_framework.renderers.JSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
     ],
+    # JSON everywhere by default; the upload view opts into multipart itself
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
-        'rest_framework.parsers.MultiPartParser',
-        'rest_framework.parsers.FormParser',
     ],
+    # Renders the analysis errors raised by the views as {'error': ...} bodies
+    'EXCEPTION_HANDLER': 'food_analyzer.exceptions.handler',
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
 }
 
 # CORS settings (for frontend integration)
-CORS_ALLOWED_ORIGINS = [
+CORS_ALLOWED_ORIGINS = (
     "http://localhost:3000",  # React default
     "http://127.0.0.1:3000",
     "http://localhost:8080",  # Vue default
     "http://127.0.0.1:8080",
-]
+)
 
-CORS_ALLOW_ALL_ORIGINS = config('CORS_ALLOW_ALL_ORIGINS', default=False, cast=bool)
+# Allow-all is a development convenience only; production always checks the list above
+CORS_ALLOW_ALL_ORIGINS = DEBUG and config('CORS_ALLOW_ALL_ORIGINS', default=False, cast=bool)
 
 # API Keys for nutrition data sources
 USDA_API_KEY = config('USDA_API_KEY', default='')
 
 # File upload settings
-FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
+# Uploads above 1MB are streamed to a temp file instead of held in worker memory
+FILE_UPLOAD_MAX_MEMORY_SIZE = 1 * 1024 * 1024  # 1MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024   # 10MB
 
 # Logging configuration
@@ -217,6 +237,20 @@ CACHES = {
     }
 }
 
+# Share the cache across workers through Redis when available
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+        'TIMEOUT': 300,  # 5 minutes
+        'OPTIONS': {
+            # Fail fast to the live sources if Redis is unreachable
+            'socket_timeout': 0.2,
+            'socket_connect_timeout': 0.2,
+        }
+    }
+
 # Security settings for production
 if not DEBUG:
     SECURE_BROWSER_XSS_FILTER = True
@@ -241,6 +275,8 @@ FOOD_DETECTION_SETTINGS = {
         'medium': 60,
         'low': 40,
     },
+    # Below this detection confidence the nutrition lookup is skipped and fallback data returned
+    'MIN_NUTRITION_CONFIDENCE': 20,
     'LEARNING_SETTINGS': {
         'MIN_OCCURRENCES_FOR_LEARNING': 3,
         'CONFIDENCE_BOOST_FACTOR': 1.15,
@@ -1,8 +1,33 @@
 from django.contrib import admin
+from django.core.cache import cache
+from django.template.loader import render_to_string
 from django.utils.html import format_html
 from django.urls import reverse
+from django.db.models import Case, CharField, Count, Value, When
 from django.utils.safestring import mark_safe
 from .models import FoodAnalysis, UserFeedback, FoodDatabase, SystemStatistics, LearningCache
+from .learning import bump_learning_version
+
+
+# DB-side bucketing so list rows carry their level instead of recomputing it in Python
+CONFIDENCE_LEVEL = Case(
+    When(confidence__gte=80, then=Value('high')),
+    When(confidence__gte=60, then=Value('medium')),
+    default=Value('low'),
+    output_field=CharField(),
+)
+CONFIDENCE_LEVEL_STYLES = {
+    'high': ('green', 'High'),
+    'medium': ('orange', 'Medium'),
+    'low': ('red', 'Low'),
+}
+
+PATTERN_STRENGTH_STYLES = {
+    'very_strong': ('green', 'Very Strong'),
+    'strong': ('blue', 'Strong'),
+    'moderate': ('orange', 'Moderate'),
+    'weak': ('red', 'Weak'),
+}
 
 
 # Custom filter to replace nonexistent admin.RangeFilter
@@ -35,12 +60,14 @@ class FoodAnalysisAdmin(admin.ModelAdmin):
         'data_source', 'created_at', 'processing_time', 'feedback_count'
     ]
     list_filter = [
-        'data_source', 'model_used', 'created_at',
+        'data_source', 'model_used',
     ConfidenceRangeFilter,
     ]
+    date_hierarchy = 'created_at'
     search_fields = ['food_name', 'data_source']
+    show_full_result_count = False
     readonly_fields = [
-        'id', 'created_at', 'updated_at', 'processing_time', 
+        'id', 'created_at', 'updated_at', 'processing_time', 'confidence_level',
         'image_preview', 'nutrition_summary', 'feedback_summary'
     ]
     fieldsets = [
@@ -65,22 +92,25 @@ class FoodAnalysisAdmin(admin.ModelAdmin):
         })
     ]
     
+    def get_queryset(self, request):
+        # Annotate feedback counts so the changelist doesn't issue one COUNT per row
+        return super().get_queryset(request).annotate(
+            _feedback_count=Count('feedbacks'),
+            _confidence_level=CONFIDENCE_LEVEL,
+        )
+    
     def confidence_level(self, obj):
-        if obj.confidence >= 80:
-            color = 'green'
-            level = 'High'
-        elif obj.confidence >= 60:
-            color = 'orange'
-            level = 'Medium'
-        else:
-            color = 'red'
-            level = 'Low'
+        level_key = getattr(obj, '_confidence_level', None)
+        if level_key is None:
+            level_key = 'high' if obj.confidence >= 80 else 'medium' if obj.confidence >= 60 else 'low'
+        color, level = CONFIDENCE_LEVEL_STYLES[level_key]
         
         return format_html(
-            '<span style="color: {}; font-weight: bold;">{} ({:.1f}%)</span>',
-            color, level, obj.confidence
+            '<span style="color: {}; font-weight: bold;">{} ({}%)</span>',
+            color, level, f'{obj.confidence:.1f}'
         )
     confidence_level.short_description = 'Confidence Level'
+    confidence_level.admin_order_field = 'confidence'
     
     def image_preview(self, obj):
         if obj.image:
@@ -92,24 +122,22 @@ class FoodAnalysisAdmin(admin.ModelAdmin):
     image_preview.short_description = 'Image Preview'
     
     def nutrition_summary(self, obj):
-        return format_html(
-            '<div style="background: #f8f9fa; padding: 10px; border-radius: 5px;">'
-            '<strong>Per 100g:</strong><br>'
-            '🔥 Calories: {:.0f} kcal<br>'
-            '🥩 Protein: {:.1f}g<br>'
-            '🥑 Fat: {:.1f}g<br>'
-            '🌾 Carbs: {:.1f}g<br>'
-            '🥬 Fiber: {:.1f}g<br>'
-            '🍯 Sugar: {:.1f}g<br>'
-            '🧂 Sodium: {:.0f}mg'
-            '</div>',
-            obj.calories_kcal or 0, obj.protein_g or 0, obj.fat_g or 0,
-            obj.carbs_g or 0, obj.fiber_g or 0, obj.sugar_g or 0, obj.sodium_mg or 0
-        )
+        if obj.pk is None or obj.updated_at is None:
+            return render_to_string('admin/food_analyzer/_nutrition_summary.html', {'o': obj})
+        
+        # Keyed on updated_at so edits to the nutrition fields invalidate the fragment
+        key = f'nutrsum:{obj.pk}:{obj.updated_at.timestamp()}'
+        html = cache.get(key)
+        if html is None:
+            html = render_to_string('admin/food_analyzer/_nutrition_summary.html', {'o': obj})
+            cache.set(key, html, 3600)
+        return mark_safe(html)
     nutrition_summary.short_description = 'Nutrition Summary'
     
     def feedback_count(self, obj):
-        count = obj.feedbacks.count()
+        count = getattr(obj, '_feedback_count', None)
+        if count is None:
+            count = obj.feedbacks.count()
         if count > 0:
             return format_html(
                 '<a href="{}?food_analysis__id={}">{} feedback(s)</a>',
@@ -118,9 +146,13 @@ class FoodAnalysisAdmin(admin.ModelAdmin):
             )
         return '0 feedbacks'
     feedback_count.short_description = 'User Feedback'
+    feedback_count.admin_order_field = '_feedback_count'
     
     def feedback_summary(self, obj):
-        feedbacks = obj.feedbacks.all()
+        # Change form only, so read the rows here (one query) rather than prefetching for every list page
+        feedbacks = list(
+            obj.feedbacks.only('id', 'food_analysis', 'feedback_type', 'created_at').order_by('-created_at')
+        )
         if not feedbacks:
             return 'No feedback received'
         
@@ -131,8 +163,8 @@ class FoodAnalysisAdmin(admin.ModelAdmin):
             color = 'green' if feedback.feedback_type in ['perfect', 'confirmation'] else 'orange'
             summary += f'<span style="color: {color};">• {feedback.get_feedback_type_display()}</span><br>'
         
-        if feedbacks.count() > 5:
-            summary += f'... and {feedbacks.count() - 5} more'
+        if len(feedbacks) > 5:
+            summary += f'... and {len(feedbacks) - 5} more'
         
         summary += '</div>'
         return format_html(summary)
@@ -145,8 +177,11 @@ class UserFeedbackAdmin(admin.ModelAdmin):
         'predicted_food', 'correct_food', 'feedback_type', 'original_confidence',
         'correction_reason', 'created_at', 'analysis_link'
     ]
-    list_filter = ['feedback_type', 'correction_reason', 'created_at']
+    list_filter = ['feedback_type', 'correction_reason']
+    date_hierarchy = 'created_at'
+    list_select_related = ('food_analysis',)
     search_fields = ['predicted_food', 'correct_food', 'user_notes']
+    show_full_result_count = False
     readonly_fields = ['created_at', 'analysis_details']
     
     fieldsets = [
@@ -162,11 +197,15 @@ class UserFeedbackAdmin(admin.ModelAdmin):
         })
     ]
     
+    def get_queryset(self, request):
+        # analysis_link/analysis_details dereference the FK; join it up front
+        return super().get_queryset(request).select_related('food_analysis', 'user')
+    
     def analysis_link(self, obj):
-        if obj.food_analysis:
+        if obj.food_analysis_id:
             return format_html(
                 '<a href="{}">View Analysis</a>',
-                reverse('admin:food_analyzer_foodanalysis_change', args=[obj.food_analysis.id])
+                reverse('admin:food_analyzer_foodanalysis_change', args=[obj.food_analysis_id])
             )
         return 'No analysis'
     analysis_link.short_description = 'Related Analysis'
@@ -197,6 +236,7 @@ class FoodDatabaseAdmin(admin.ModelAdmin):
     ]
     list_filter = ['category', 'data_source', 'data_quality']
     search_fields = ['food_name', 'alternative_names']
+    show_full_result_count = False
     readonly_fields = ['search_count', 'last_searched', 'created_at', 'updated_at']
     
     fieldsets = [
@@ -234,7 +274,7 @@ class SystemStatisticsAdmin(admin.ModelAdmin):
         'date', 'total_predictions', 'accuracy_rate', 'high_confidence_accuracy',
         'total_corrections', 'nutrition_success_rate', 'last_updated'
     ]
-    list_filter = ['date']
+    date_hierarchy = 'date'
     readonly_fields = [
         'date', 'last_updated', 'performance_summary', 'confidence_breakdown',
         'learning_summary'
@@ -333,8 +373,9 @@ class LearningCacheAdmin(admin.ModelAdmin):
         'predicted_food', 'correct_food', 'occurrence_count',
         'confidence_boost', 'success_rate', 'last_seen'
     ]
-    list_filter = ['first_seen', 'last_seen']
+    date_hierarchy = 'last_seen'
     search_fields = ['predicted_food', 'correct_food']
+    show_full_result_count = False
     readonly_fields = ['first_seen', 'last_seen', 'pattern_strength']
     
     fieldsets = [
@@ -357,26 +398,38 @@ class LearningCacheAdmin(admin.ModelAdmin):
         })
     ]
     
+    # Hand edits change what the analyzer applies, so drop its memoised corrections
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        bump_learning_version()
+    
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        bump_learning_version()
+    
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        bump_learning_version()
+    
     def pattern_strength(self, obj):
-        strength = 'Weak'
-        color = 'red'
-        
+        # Change form only, so bucket the one row in Python rather than annotating every query
         if obj.occurrence_count >= 10:
-            strength = 'Very Strong'
-            color = 'green'
+            strength_key = 'very_strong'
         elif obj.occurrence_count >= 5:
-            strength = 'Strong'
-            color = 'blue'
+            strength_key = 'strong'
         elif obj.occurrence_count >= 3:
-            strength = 'Moderate'
-            color = 'orange'
+            strength_key = 'moderate'
+        else:
+            strength_key = 'weak'
+        color, strength = PATTERN_STRENGTH_STYLES[strength_key]
         
         return format_html(
             '<span style="color: {}; font-weight: bold;">{}</span><br>'
-            '<small>Used {} times with {:.1f}% success rate</small>',
-            color, strength, obj.occurrence_count, obj.success_rate
+            '<small>Used {} times with {}% success rate</small>',
+            color, strength, obj.occurrence_count, f'{obj.success_rate:.1f}'
         )
     pattern_strength.short_description = 'Pattern Strength'
+    pattern_strength.admin_order_field = 'occurrence_count'
 
 
 # Custom admin site configuration
@@ -1,6 +1,56 @@
+import os
+import sys
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
 from django.apps import AppConfig
 
+logger = logging.getLogger(__name__)
+
 
 class FoodAnalyzerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'food_analyzer'
+    
+    def ready(self):
+        # Opt-in for the same reason as the warm-up: the listener thread doesn't survive a --preload fork
+        if os.getenv('LOG_QUEUE', 'False').lower() in ('true', '1'):
+            _queue_log_handlers(('', 'django', 'food_analyzer'))
+        
+        # Opt-in so management commands don't load the backbones; don't combine with gunicorn --preload,
+        # TensorFlow's threads don't survive the fork
+        if os.getenv('DETECTOR_WARMUP', 'False').lower() not in ('true', '1'):
+            return
+        # Under runserver only the reloaded child process serves requests
+        if 'runserver' in sys.argv and '--noreload' not in sys.argv and os.environ.get('RUN_MAIN') != 'true':
+            return
+        threading.Thread(target=_warm_up_detector, name='detector-warmup', daemon=True).start()
+
+
+def _queue_log_handlers(logger_names):
+    """Hand each logger's records to a background thread so request threads never block on stderr or disk"""
+    for name in logger_names:
+        target = logging.getLogger(name)
+        handlers = [h for h in target.handlers if not isinstance(h, QueueHandler)]
+        if not handlers:
+            continue
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        for handler in handlers:
+            target.removeHandler(handler)
+        target.addHandler(QueueHandler(log_queue))
+        listener.start()
+        # Drain what's queued on shutdown
+        atexit.register(listener.stop)
+
+
+def _warm_up_detector():
+    """Load the shared detector and run a dummy batch; requests arriving meanwhile wait on its lock"""
+    try:
+        from .utils.enhanced_food_detector import get_detector
+        get_detector().warm_up()
+        logger.info("Detector warmed up")
+    except Exception as e:
+        logger.error(f"Detector warm-up failed: {e}")
@@ -0,0 +1,46 @@
+import time
+import logging
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import exception_handler
+
+from .utils.image_processor import InvalidImageError
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidUploadError(Exception):
+    """The request carried no usable image upload"""
+
+
+class ClassificationError(Exception):
+    """The detector failed on an image it could decode"""
+
+
+def handler(exc, context):
+    """DRF exception handler rendering analysis failures as the API's {'error': ...} bodies"""
+    if isinstance(exc, InvalidUploadError):
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    if isinstance(exc, InvalidImageError):
+        logger.warning(f"Rejected undecodable upload: {exc}")
+        return Response({'error': 'File must be an image'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    if isinstance(exc, ClassificationError):
+        logger.error(f"Food detection failed: {exc}")
+        return Response(
+            {'error': f'Food classification failed: {exc}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    
+    response = exception_handler(exc, context)
+    if response is not None:
+        return response
+    
+    # Anything else escaping a view: log the traceback once and answer in the API's format
+    logger.exception(f"Analysis exception: {exc}")
+    data = {'error': f'Analysis failed: {exc}'}
+    start_time = getattr(context.get('view'), 'start_time', None)
+    if start_time is not None:
+        data['processing_time'] = round(time.time() - start_time, 2)
+    return Response(data, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,41 @@
+import time
+from functools import lru_cache
+
+from django.core.cache import cache
+
+from .models import LearningCache
+
+# Bumped whenever LearningCache changes. With a shared cache backend (Redis) every process sees the
+# bump at once; with the per-process LocMemCache only the bumping process does, so memo entries
+# also expire after LEARNING_MEMO_TTL and other workers pick up corrections within that window.
+LEARNING_VERSION_KEY = 'learning_cache:version'
+LEARNING_MEMO_TTL = 60  # seconds
+
+
+def learning_version():
+    """Current LearningCache version; a fresh one is minted if the key was evicted"""
+    return cache.get_or_set(LEARNING_VERSION_KEY, time.time_ns, None)
+
+
+def bump_learning_version():
+    """Invalidate memoised learning corrections"""
+    try:
+        cache.incr(LEARNING_VERSION_KEY)
+    except ValueError:
+        # Key missing; any fresh timestamp is a version no process has cached against
+        cache.set(LEARNING_VERSION_KEY, time.time_ns(), None)
+
+
+def lookup_correction(predicted_food):
+    """Best learned (correct_food, confidence_boost) for a normalised prediction, or None"""
+    return _lookup_correction(predicted_food, learning_version(), int(time.monotonic() // LEARNING_MEMO_TTL))
+
+
+@lru_cache(maxsize=4096)
+def _lookup_correction(predicted_food, version, ttl_bucket):
+    # version and ttl_bucket only key the memo; a new value of either misses and re-queries
+    return LearningCache.objects.filter(
+        predicted_food=predicted_food
+    ).order_by('-occurrence_count', '-last_seen').values_list(
+        'correct_food', 'confidence_boost'
+    ).first()
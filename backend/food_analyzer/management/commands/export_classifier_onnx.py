@@ -0,0 +1,24 @@
+import os
+import tensorflow as tf
+from django.core.management.base import BaseCommand, CommandError
+
+from food_analyzer.utils.onnx_model import export_onnx
+
+
+class Command(BaseCommand):
+    help = 'Export the Food-101 classifier to ONNX for GPU inference through ONNX Runtime (TensorRT / CUDA)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--model', default=os.getenv('MODEL_PATH', 'models/food101_model.h5'))
+        parser.add_argument('--output', default=os.getenv('ONNX_MODEL_PATH', 'models/food101.onnx'))
+        parser.add_argument('--opset', type=int, default=17)
+    
+    def handle(self, *args, **options):
+        if not os.path.exists(options['model']):
+            raise CommandError(f"Model file not found at {options['model']}")
+        
+        model = tf.keras.models.load_model(options['model'])
+        os.makedirs(os.path.dirname(options['output']) or '.', exist_ok=True)
+        export_onnx(model, options['output'], opset=options['opset'])
+        
+        self.stdout.write(self.style.SUCCESS(f"✅ Wrote {options['output']}"))
@@ -0,0 +1,52 @@
+import os
+import logging
+import numpy as np
+import tensorflow as tf
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from food_analyzer.utils.image_processor import ImageProcessor
+from food_analyzer.utils.tflite import export_int8_tflite
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Export the Food-101 classifier as an INT8-quantized TFLite model'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--samples', default=os.path.join(settings.MEDIA_ROOT, 'food_images'),
+            help='Directory of food images used to calibrate the quantization ranges'
+        )
+        parser.add_argument('--limit', type=int, default=100, help='Maximum number of calibration images')
+        parser.add_argument('--model', default=os.getenv('MODEL_PATH', 'models/food101_model.h5'))
+        parser.add_argument('--output', default=os.getenv('TFLITE_MODEL_PATH', 'models/food101_int8.tflite'))
+    
+    def handle(self, *args, **options):
+        if not os.path.exists(options['model']):
+            raise CommandError(f"Model file not found at {options['model']}")
+        
+        batches = self._load_samples(options['samples'], options['limit'])
+        if not batches:
+            raise CommandError(f"No calibration images found in {options['samples']}")
+        
+        model = tf.keras.models.load_model(options['model'])
+        os.makedirs(os.path.dirname(options['output']) or '.', exist_ok=True)
+        export_int8_tflite(model, options['output'], batches)
+        
+        self.stdout.write(self.style.SUCCESS(f"✅ Wrote {options['output']}"))
+    
+    def _load_samples(self, directory, limit):
+        # Calibrate on exactly what FoodClassifier.predict receives
+        batches = []
+        if not os.path.isdir(directory):
+            return batches
+        
+        for filename in sorted(os.listdir(directory))[:limit]:
+            try:
+                with open(os.path.join(directory, filename), 'rb') as f:
+                    batches.append(ImageProcessor.preprocess_image(f).astype(np.float32))
+            except Exception as e:
+                logger.warning(f"Skipping calibration image {filename}: {e}")
+        return batches
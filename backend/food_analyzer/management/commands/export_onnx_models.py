@@ -0,0 +1,40 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+
+from food_analyzer.utils.enhanced_food_detector import BACKBONES, ONNX_MODEL_DIR
+from food_analyzer.utils.onnx_model import export_onnx, quantize_int8
+
+
+class Command(BaseCommand):
+    help = 'Export the detector backbones to ONNX for inference through ONNX Runtime (CPU / CUDA / TensorRT)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=ONNX_MODEL_DIR, help='Directory to write the .onnx files to')
+        parser.add_argument('--models', nargs='+', choices=sorted(BACKBONES), default=list(BACKBONES))
+        parser.add_argument('--opset', type=int, default=17)
+        parser.add_argument(
+            '--fp16', action='store_true',
+            help='Store weights and inputs as float16 (needs onnxconverter-common); best on GPU'
+        )
+        parser.add_argument(
+            '--int8', action='store_true',
+            help='Also write dynamically INT8-quantized models, which the detector prefers; best on CPU'
+        )
+    
+    def handle(self, *args, **options):
+        if options['fp16'] and options['int8']:
+            raise CommandError('--int8 quantizes an FP32 export; drop --fp16')
+        
+        os.makedirs(options['output'], exist_ok=True)
+        
+        for model_name in options['models']:
+            self.stdout.write(f"Exporting {model_name}...")
+            model = BACKBONES[model_name](weights='imagenet', include_top=True)
+            output_path = os.path.join(options['output'], f'{model_name}.onnx')
+            export_onnx(model, output_path, opset=options['opset'], fp16=options['fp16'])
+            self.stdout.write(self.style.SUCCESS(f"✅ Wrote {output_path}"))
+            
+            if options['int8']:
+                int8_path = os.path.join(options['output'], f'{model_name}_int8.onnx')
+                quantize_int8(output_path, int8_path)
+                self.stdout.write(self.style.SUCCESS(f"✅ Wrote {int8_path}"))
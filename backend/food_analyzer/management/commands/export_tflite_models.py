@@ -0,0 +1,60 @@
+import os
+import logging
+import numpy as np
+from PIL import Image
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from tensorflow.keras.preprocessing import image
+
+from food_analyzer.utils.enhanced_food_detector import BACKBONES, PREPROCESSORS, TFLITE_MODEL_DIR
+from food_analyzer.utils.tflite import export_int8_tflite
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Export the detector backbones as INT8-quantized TFLite models'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--samples', default=os.path.join(settings.MEDIA_ROOT, 'food_images'),
+            help='Directory of food images used to calibrate the quantization ranges'
+        )
+        parser.add_argument('--limit', type=int, default=100, help='Maximum number of calibration images')
+        parser.add_argument('--output', default=TFLITE_MODEL_DIR, help='Directory to write the .tflite files to')
+        parser.add_argument('--models', nargs='+', choices=sorted(BACKBONES), default=list(BACKBONES))
+    
+    def handle(self, *args, **options):
+        samples = self._load_samples(options['samples'], options['limit'])
+        if not samples:
+            raise CommandError(f"No calibration images found in {options['samples']}")
+        
+        os.makedirs(options['output'], exist_ok=True)
+        
+        for model_name in options['models']:
+            self.stdout.write(f"Exporting {model_name}...")
+            model = BACKBONES[model_name](weights='imagenet', include_top=True)
+            height, width = model.input_shape[1:3]
+            preprocess = PREPROCESSORS[model_name]
+            
+            batches = [
+                preprocess(np.expand_dims(image.img_to_array(img.resize((width, height))), axis=0))
+                for img in samples
+            ]
+            output_path = os.path.join(options['output'], f'{model_name}_int8.tflite')
+            export_int8_tflite(model, output_path, batches)
+            
+            self.stdout.write(self.style.SUCCESS(f"✅ Wrote {output_path}"))
+    
+    def _load_samples(self, directory, limit):
+        samples = []
+        if not os.path.isdir(directory):
+            return samples
+        
+        for filename in sorted(os.listdir(directory))[:limit]:
+            try:
+                with Image.open(os.path.join(directory, filename)) as img:
+                    samples.append(img.convert('RGB'))
+            except Exception as e:
+                logger.warning(f"Skipping calibration image {filename}: {e}")
+        return samples
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-15 20:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("food_analyzer", "0002_fooddatabase_systemstatistics_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="foodanalysis",
+            index=models.Index(fields=["-created_at"], name="foodanalysis_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="foodanalysis",
+            index=models.Index(
+                fields=["confidence"], name="foodanalysis_confidence_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="foodanalysis",
+            index=models.Index(fields=["data_source"], name="foodanalysis_source_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="foodanalysis",
+            index=models.Index(fields=["model_used"], name="foodanalysis_model_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="fooddatabase",
+            index=models.Index(
+                fields=["category", "data_source"], name="fooddb_category_source_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="fooddatabase",
+            index=models.Index(fields=["data_quality"], name="fooddb_quality_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="userfeedback",
+            index=models.Index(
+                fields=["feedback_type", "-created_at"],
+                name="feedback_type_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="userfeedback",
+            index=models.Index(
+                fields=["food_analysis", "-created_at"],
+                name="feedback_analysis_created_idx",
+            ),
+        ),
+    ]
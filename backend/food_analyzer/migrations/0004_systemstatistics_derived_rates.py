@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-15 20:56
+
+from django.db import migrations, models
+
+
+def backfill_rates(apps, schema_editor):
+    SystemStatistics = apps.get_model("food_analyzer", "SystemStatistics")
+
+    def rate(part, total):
+        return (part / total) * 100 if total > 0 else 0.0
+
+    for stats in SystemStatistics.objects.all():
+        stats.high_confidence_accuracy = rate(
+            stats.high_confidence_correct, stats.high_confidence_predictions
+        )
+        stats.medium_confidence_accuracy = rate(
+            stats.medium_confidence_correct, stats.medium_confidence_predictions
+        )
+        stats.low_confidence_accuracy = rate(
+            stats.low_confidence_correct, stats.low_confidence_predictions
+        )
+        stats.nutrition_search_success_rate = rate(
+            stats.successful_nutrition_searches, stats.total_nutrition_searches
+        )
+        stats.save(
+            update_fields=[
+                "high_confidence_accuracy",
+                "medium_confidence_accuracy",
+                "low_confidence_accuracy",
+                "nutrition_search_success_rate",
+            ]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("food_analyzer", "0003_analysis_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="systemstatistics",
+            name="high_confidence_accuracy",
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name="systemstatistics",
+            name="low_confidence_accuracy",
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name="systemstatistics",
+            name="medium_confidence_accuracy",
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name="systemstatistics",
+            name="nutrition_search_success_rate",
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.RunPython(backfill_rates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+# pg_trgm only exists on PostgreSQL; other backends keep the text scan. The index is on
+# UPPER(alternative_names::text) because that's what Django's icontains compiles to there.
+def create_alternative_names_trgm(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS fooddb_altnames_trgm "
+        "ON food_analyzer_fooddatabase USING gin (UPPER(alternative_names::text) gin_trgm_ops)"
+    )
+
+
+def drop_alternative_names_trgm(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS fooddb_altnames_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("food_analyzer", "0004_systemstatistics_derived_rates"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_alternative_names_trgm, drop_alternative_names_trgm),
+    ]
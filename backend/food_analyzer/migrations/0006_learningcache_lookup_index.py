@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-15 20:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("food_analyzer", "0005_fooddatabase_alternative_names_gin"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="learningcache",
+            index=models.Index(
+                fields=["predicted_food", "-occurrence_count", "-last_seen"],
+                name="learning_predicted_rank_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+
+# INCLUDE columns only exist on PostgreSQL, where they let the correction lookup be answered
+# from the index alone; other backends keep the plain index from 0006
+def make_lookup_index_covering(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS learning_predicted_rank_idx")
+    schema_editor.execute(
+        "CREATE INDEX learning_predicted_rank_idx ON food_analyzer_learningcache "
+        "(predicted_food, occurrence_count DESC, last_seen DESC) "
+        "INCLUDE (correct_food, confidence_boost)"
+    )
+
+
+def make_lookup_index_plain(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS learning_predicted_rank_idx")
+    schema_editor.execute(
+        "CREATE INDEX learning_predicted_rank_idx ON food_analyzer_learningcache "
+        "(predicted_food, occurrence_count DESC, last_seen DESC)"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("food_analyzer", "0006_learningcache_lookup_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(make_lookup_index_covering, make_lookup_index_plain),
+    ]
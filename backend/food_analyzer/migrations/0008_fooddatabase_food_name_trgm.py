@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+# pg_trgm only exists on PostgreSQL; other backends keep the text scan. The index is on
+# UPPER(food_name::text) because that's what Django's icontains compiles to there.
+def create_food_name_trgm(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS fooddb_name_trgm "
+        "ON food_analyzer_fooddatabase USING gin (UPPER(food_name::text) gin_trgm_ops)"
+    )
+
+
+def drop_food_name_trgm(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS fooddb_name_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("food_analyzer", "0007_learningcache_covering_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_food_name_trgm, drop_food_name_trgm),
+    ]
@@ -34,6 +34,12 @@ class FoodAnalysis(models.Model):
         verbose_name = "Food Analysis"
         verbose_name_plural = "Food Analyses"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='foodanalysis_created_idx'),
+            models.Index(fields=['confidence'], name='foodanalysis_confidence_idx'),
+            models.Index(fields=['data_source'], name='foodanalysis_source_idx'),
+            models.Index(fields=['model_used'], name='foodanalysis_model_idx'),
+        ]
     
     def __str__(self):
         return f"{self.food_name} - {self.confidence:.1f}% confidence"
@@ -80,6 +86,10 @@ class UserFeedback(models.Model):
         verbose_name = "User Feedback"
         verbose_name_plural = "User Feedbacks"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['feedback_type', '-created_at'], name='feedback_type_created_idx'),
+            models.Index(fields=['food_analysis', '-created_at'], name='feedback_analysis_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.feedback_type}: {self.predicted_food} → {self.correct_food or 'N/A'}"
@@ -126,6 +136,11 @@ class FoodDatabase(models.Model):
         verbose_name = "Food Database Entry"
         verbose_name_plural = "Food Database Entries"
         ordering = ['food_name']
+        # food_name is already covered by its unique index
+        indexes = [
+            models.Index(fields=['category', 'data_source'], name='fooddb_category_source_idx'),
+            models.Index(fields=['data_quality'], name='fooddb_quality_idx'),
+        ]
     
     def __str__(self):
         return self.food_name
@@ -159,6 +174,12 @@ class SystemStatistics(models.Model):
     # Processing metrics
     average_processing_time = models.FloatField(default=0.0)  # in seconds
     
+    # Derived rates, refreshed on save() so reads don't recompute them
+    high_confidence_accuracy = models.FloatField(default=0.0)
+    medium_confidence_accuracy = models.FloatField(default=0.0)
+    low_confidence_accuracy = models.FloatField(default=0.0)
+    nutrition_search_success_rate = models.FloatField(default=0.0)
+    
     # Timestamps
     date = models.DateField(auto_now=True)
     last_updated = models.DateTimeField(auto_now=True)
@@ -171,29 +192,35 @@ class SystemStatistics(models.Model):
     def __str__(self):
         return f"Stats for {self.date} - {self.accuracy_rate:.1f}% accuracy"
     
-    @property
-    def high_confidence_accuracy(self):
-        if self.high_confidence_predictions > 0:
-            return (self.high_confidence_correct / self.high_confidence_predictions) * 100
-        return 0.0
+    DERIVED_RATE_FIELDS = (
+        'accuracy_rate', 'high_confidence_accuracy', 'medium_confidence_accuracy',
+        'low_confidence_accuracy', 'nutrition_search_success_rate',
+    )
     
-    @property
-    def medium_confidence_accuracy(self):
-        if self.medium_confidence_predictions > 0:
-            return (self.medium_confidence_correct / self.medium_confidence_predictions) * 100
+    @staticmethod
+    def _rate(part, total):
+        if total > 0:
+            return (part / total) * 100
         return 0.0
     
-    @property
-    def low_confidence_accuracy(self):
-        if self.low_confidence_predictions > 0:
-            return (self.low_confidence_correct / self.low_confidence_predictions) * 100
-        return 0.0
-    
-    @property
-    def nutrition_search_success_rate(self):
-        if self.total_nutrition_searches > 0:
-            return (self.successful_nutrition_searches / self.total_nutrition_searches) * 100
-        return 0.0
+    def refresh_rates(self):
+        """Recompute the derived percentage fields from the raw counters"""
+        self.accuracy_rate = self._rate(self.correct_predictions, self.total_predictions)
+        self.high_confidence_accuracy = self._rate(
+            self.high_confidence_correct, self.high_confidence_predictions)
+        self.medium_confidence_accuracy = self._rate(
+            self.medium_confidence_correct, self.medium_confidence_predictions)
+        self.low_confidence_accuracy = self._rate(
+            self.low_confidence_correct, self.low_confidence_predictions)
+        self.nutrition_search_success_rate = self._rate(
+            self.successful_nutrition_searches, self.total_nutrition_searches)
+    
+    def save(self, *args, **kwargs):
+        self.refresh_rates()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | set(self.DERIVED_RATE_FIELDS)
+        super().save(*args, **kwargs)
 
 
 class LearningCache(models.Model):
@@ -221,6 +248,14 @@ class LearningCache(models.Model):
         verbose_name_plural = "Learning Cache"
         unique_together = ['predicted_food', 'correct_food']
         ordering = ['-occurrence_count', '-last_seen']
+        indexes = [
+            # Serves the per-prediction lookup in AnalyzeFoodView, including its ordering
+            # (made covering on PostgreSQL by migration 0007)
+            models.Index(
+                fields=['predicted_food', '-occurrence_count', '-last_seen'],
+                name='learning_predicted_rank_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.predicted_food} → {self.correct_food} ({self.occurrence_count}x)"
\ No newline at end of file
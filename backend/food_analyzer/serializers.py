@@ -1,14 +1,79 @@
+from bisect import bisect_right
+from functools import cached_property, lru_cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
 from rest_framework import serializers
 from .models import FoodAnalysis, UserFeedback, FoodDatabase, SystemStatistics
+from .learning import bump_learning_version
+
+
+# Micronutrients not tracked on FoodAnalysis yet; shared so each row doesn't rebuild them
+EMPTY_MICROS = {
+    'calcium_mg': None,  # Placeholder for future enhancement
+    'iron_mg': None,
+    'vitamin_c_mg': None,
+}
+
+# Display names for FoodAnalysis.data_source values
+SOURCE_MAP = {
+    'usda': 'USDA FoodData Central',
+    'openfoodfacts': 'OpenFoodFacts Database',
+    'google_search': 'Google Nutrition Search',
+    'mock_data': 'Built-in Food Database',
+    'default_fallback': 'Default Nutrition Values'
+}
+
+# Columns read by FoodAnalysisSerializer, for narrowing list querysets with .only()
+FOOD_ANALYSIS_COLUMNS = (
+    'id', 'image', 'food_name', 'confidence', 'serving_size',
+    'calories_kcal', 'protein_g', 'fat_g', 'carbs_g', 'fiber_g', 'sugar_g', 'sodium_mg',
+    'model_used', 'processing_time', 'data_source', 'created_at',
+)
+
+# Confidence cut-offs and the (level, description, recommendation) for each bucket
+CONFIDENCE_BOUNDS = (50, 60, 70, 80, 90)
+RECOMMEND_VERIFY = 'Low confidence result. Please verify or provide feedback to improve accuracy.'
+RECOMMEND_CHECK = 'Result is probably correct, but please verify if needed.'
+RECOMMEND_TRUST = 'Result is likely accurate. You can trust this detection.'
+CONFIDENCE_ANALYSIS = (
+    ('low', 'Low confidence - Please verify result', RECOMMEND_VERIFY),
+    ('low_medium', 'Low-medium confidence - High uncertainty', RECOMMEND_VERIFY),
+    ('medium', 'Medium confidence - Some uncertainty', RECOMMEND_CHECK),
+    ('medium_high', 'Good confidence - Moderate model agreement', RECOMMEND_CHECK),
+    ('high', 'High confidence - Good model agreement', RECOMMEND_TRUST),
+    ('very_high', 'Extremely confident - Multiple models strongly agree', RECOMMEND_TRUST),
+)
+
+# Coarse levels used in analysis_metadata
+CONFIDENCE_LEVEL_BOUNDS = (60, 80)
+CONFIDENCE_LEVELS = ('low', 'medium', 'high')
+
+
+@lru_cache(maxsize=1024)
+def learning_improvement(total_corrections, total_confirmations):
+    """Confirmation rate as a percentage of all feedback"""
+    total_feedback = total_corrections + total_confirmations
+    if total_feedback > 0:
+        confirmation_rate = (total_confirmations / total_feedback) * 100
+        return round(confirmation_rate, 2)
+    return 0.0
+
+
+# Formats created_at like the generated field would, without building the field set per instance
+CREATED_AT_FIELD = serializers.DateTimeField(read_only=True)
 
 
 class FoodAnalysisSerializer(serializers.ModelSerializer):
-    macros = serializers.SerializerMethodField()
-    micros = serializers.SerializerMethodField()
-    serving = serializers.SerializerMethodField()
-    sources = serializers.SerializerMethodField()
-    image_url = serializers.SerializerMethodField()
-    analysis_metadata = serializers.SerializerMethodField()
+    """Analysis output, assembled in to_representation instead of per-field method calls"""
+    
+    # Describe the computed keys for schemas and the browsable API; to_representation doesn't use them
+    serving = serializers.CharField(read_only=True)
+    macros = serializers.DictField(read_only=True)
+    micros = serializers.DictField(read_only=True)
+    sources = serializers.ListField(child=serializers.CharField(), read_only=True)
+    image_url = serializers.URLField(read_only=True)
+    analysis_metadata = serializers.DictField(read_only=True)
     
     class Meta:
         model = FoodAnalysis
@@ -17,62 +82,73 @@ class FoodAnalysisSerializer(serializers.ModelSerializer):
             'macros', 'micros', 'sources', 'image_url', 'analysis_metadata',
             'created_at', 'processing_time'
         ]
+        read_only_fields = fields
     
-    def get_macros(self, obj):
+    def to_representation(self, instance):
+        created_at = instance.created_at
+        calories_kcal = instance.calories_kcal
+        processing_time = instance.processing_time
+        data_source = instance.data_source
+        
         return {
-            'protein_g': obj.protein_g or 0,
-            'fat_g': obj.fat_g or 0,
-            'carbs_g': obj.carbs_g or 0,
-            'fiber_g': obj.fiber_g or 0,
+            'id': str(instance.id),
+            'food_name': instance.food_name,
+            'confidence': float(instance.confidence),
+            'serving': instance.serving_size or "100g",
+            'calories_kcal': float(calories_kcal) if calories_kcal is not None else None,
+            'macros': {
+                'protein_g': instance.protein_g or 0,
+                'fat_g': instance.fat_g or 0,
+                'carbs_g': instance.carbs_g or 0,
+                'fiber_g': instance.fiber_g or 0,
+            },
+            'micros': {
+                'sugar_g': instance.sugar_g or 0,
+                'sodium_mg': instance.sodium_mg or 0,
+                **EMPTY_MICROS,
+            },
+            'sources': self.get_sources(instance),
+            'image_url': self.get_image_url(instance),
+            'analysis_metadata': {
+                'model_used': instance.model_used,
+                'processing_time': processing_time,
+                'data_source': data_source,
+                'confidence_level': self._get_confidence_level(instance.confidence),
+            },
+            'created_at': CREATED_AT_FIELD.to_representation(created_at) if created_at else None,
+            'processing_time': float(processing_time) if processing_time is not None else None,
         }
     
-    def get_micros(self, obj):
-        return {
-            'sugar_g': obj.sugar_g or 0,
-            'sodium_mg': obj.sodium_mg or 0,
-            'calcium_mg': None,  # Placeholder for future enhancement
-            'iron_mg': None,
-            'vitamin_c_mg': None,
-        }
+    @staticmethod
+    def get_sources(obj):
+        data_source = obj.data_source
+        if data_source:
+            return ['Multi-Model AI Detection', SOURCE_MAP.get(data_source, data_source)]
+        return ['Multi-Model AI Detection']
     
-    def get_sources(self, obj):
-        sources = ['Multi-Model AI Detection']
-        if obj.data_source:
-            source_map = {
-                'usda': 'USDA FoodData Central',
-                'openfoodfacts': 'OpenFoodFacts Database',
-                'google_search': 'Google Nutrition Search',
-                'mock_data': 'Built-in Food Database',
-                'default_fallback': 'Default Nutrition Values'
-            }
-            sources.append(source_map.get(obj.data_source, obj.data_source))
-        return sources
+    @cached_property
+    def _request(self):
+        # Looked up once per serializer rather than once per row in list responses
+        return self.context.get('request')
+    
+    @cached_property
+    def _base_url(self):
+        # scheme://host resolved once instead of per row
+        return self._request.build_absolute_uri('/')[:-1]
     
     def get_image_url(self, obj):
         if obj.image:
-            request = self.context.get('request')
+            request = self._request
             if request:
-                return request.build_absolute_uri(obj.image.url)
+                url = obj.image.url
+                if url.startswith('/') and not url.startswith('//'):
+                    return self._base_url + url
+                return request.build_absolute_uri(url)
         return None
     
-    def get_serving(self, obj):
-        return obj.serving_size or "100g"
-    
-    def get_analysis_metadata(self, obj):
-        return {
-            'model_used': obj.model_used,
-            'processing_time': obj.processing_time,
-            'data_source': obj.data_source,
-            'confidence_level': self._get_confidence_level(obj.confidence),
-        }
-    
-    def _get_confidence_level(self, confidence):
-        if confidence >= 80:
-            return 'high'
-        elif confidence >= 60:
-            return 'medium'
-        else:
-            return 'low'
+    @staticmethod
+    def _get_confidence_level(confidence):
+        return CONFIDENCE_LEVELS[bisect_right(CONFIDENCE_LEVEL_BOUNDS, confidence)]
 
 
 class UserFeedbackSerializer(serializers.ModelSerializer):
@@ -98,30 +174,49 @@ class UserFeedbackSerializer(serializers.ModelSerializer):
         """Update learning cache with new correction pattern"""
         from .models import LearningCache
         
+        if not feedback.correct_food:
+            return
+        
+        predicted_food = feedback.predicted_food.lower().strip()
+        correct_food = feedback.correct_food.lower().strip()
+        pattern = LearningCache.objects.filter(
+            predicted_food=predicted_food, correct_food=correct_food
+        )
+        
         try:
-            cache_entry, created = LearningCache.objects.get_or_create(
-                predicted_food=feedback.predicted_food.lower().strip(),
-                correct_food=feedback.correct_food.lower().strip(),
-                defaults={
-                    'average_original_confidence': feedback.original_confidence,
-                    'occurrence_count': 1,
-                }
-            )
-            
-            if not created:
-                # Update existing entry
-                cache_entry.occurrence_count += 1
-                cache_entry.average_original_confidence = (
-                    (cache_entry.average_original_confidence * (cache_entry.occurrence_count - 1) + 
-                     feedback.original_confidence) / cache_entry.occurrence_count
-                )
-                cache_entry.save()
+            with transaction.atomic():
+                if not self._record_occurrence(pattern, feedback.original_confidence):
+                    try:
+                        with transaction.atomic():
+                            LearningCache.objects.create(
+                                predicted_food=predicted_food,
+                                correct_food=correct_food,
+                                average_original_confidence=feedback.original_confidence,
+                                occurrence_count=1,
+                            )
+                    except IntegrityError:
+                        # Another request created the pattern first; count against it
+                        self._record_occurrence(pattern, feedback.original_confidence)
+                transaction.on_commit(bump_learning_version)
                 
         except Exception as e:
             # Log error but don't fail the feedback creation
             import logging
             logger = logging.getLogger(__name__)
             logger.error(f"Error updating learning cache: {e}")
+    
+    @staticmethod
+    def _record_occurrence(pattern, original_confidence):
+        """Bump an existing pattern in one UPDATE; returns the number of rows matched"""
+        # Every F() on the right-hand side reads the pre-update row values
+        return pattern.update(
+            occurrence_count=F('occurrence_count') + 1,
+            average_original_confidence=(
+                (F('average_original_confidence') * F('occurrence_count') + original_confidence)
+                / (F('occurrence_count') + 1)
+            ),
+            last_seen=timezone.now(),
+        )
 
 
 class FoodDatabaseSerializer(serializers.ModelSerializer):
@@ -191,11 +286,7 @@ class SystemStatisticsSerializer(serializers.ModelSerializer):
     
     def _calculate_learning_improvement(self, obj):
         """Calculate learning improvement based on corrections vs confirmations"""
-        total_feedback = obj.total_corrections + obj.total_confirmations
-        if total_feedback > 0:
-            confirmation_rate = (obj.total_confirmations / total_feedback) * 100
-            return round(confirmation_rate, 2)
-        return 0.0
+        return learning_improvement(obj.total_corrections, obj.total_confirmations)
 
 
 class DetailedAnalysisSerializer(serializers.ModelSerializer):
@@ -232,31 +323,13 @@ class DetailedAnalysisSerializer(serializers.ModelSerializer):
     
     def get_confidence_analysis(self, obj):
         confidence = obj.confidence
-        
-        if confidence >= 90:
-            level = 'very_high'
-            description = 'Extremely confident - Multiple models strongly agree'
-        elif confidence >= 80:
-            level = 'high'
-            description = 'High confidence - Good model agreement'
-        elif confidence >= 70:
-            level = 'medium_high'
-            description = 'Good confidence - Moderate model agreement'
-        elif confidence >= 60:
-            level = 'medium'
-            description = 'Medium confidence - Some uncertainty'
-        elif confidence >= 50:
-            level = 'low_medium'
-            description = 'Low-medium confidence - High uncertainty'
-        else:
-            level = 'low'
-            description = 'Low confidence - Please verify result'
+        level, description, recommendation = CONFIDENCE_ANALYSIS[bisect_right(CONFIDENCE_BOUNDS, confidence)]
         
         return {
             'level': level,
             'score': confidence,
             'description': description,
-            'recommendation': self._get_confidence_recommendation(confidence)
+            'recommendation': recommendation
         }
     
     def get_similar_foods(self, obj):
@@ -270,26 +343,19 @@ class DetailedAnalysisSerializer(serializers.ModelSerializer):
     
     def get_user_feedback_summary(self, obj):
         """Get summary of user feedback for this analysis"""
-        feedbacks = obj.feedbacks.all()
+        # Aggregated in memory so a prefetched 'feedbacks' relation costs no extra queries
+        feedbacks = list(obj.feedbacks.all())
         
-        if not feedbacks.exists():
+        if not feedbacks:
             return {'has_feedback': False}
         
-        feedback_types = list(feedbacks.values_list('feedback_type', flat=True))
-        corrections = feedbacks.filter(feedback_type__in=['correction', 'wrong'])
+        feedback_types = [feedback.feedback_type for feedback in feedbacks]
         
         return {
             'has_feedback': True,
-            'feedback_count': feedbacks.count(),
+            'feedback_count': len(feedbacks),
             'feedback_types': feedback_types,
-            'has_corrections': corrections.exists(),
-            'latest_feedback': feedbacks.first().feedback_type if feedbacks.exists() else None
+            'has_corrections': any(t in ('correction', 'wrong') for t in feedback_types),
+            # The relation is ordered newest first (explicitly so in DetailedAnalysisView's prefetch)
+            'latest_feedback': feedback_types[0],
         }
-    
-    def _get_confidence_recommendation(self, confidence):
-        if confidence >= 80:
-            return 'Result is likely accurate. You can trust this detection.'
-        elif confidence >= 60:
-            return 'Result is probably correct, but please verify if needed.'
-        else:
-            return 'Low confidence result. Please verify or provide feedback to improve accuracy.'
\ No newline at end of file
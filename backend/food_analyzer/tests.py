@@ -1,3 +1,618 @@
-from django.test import TestCase
+import io
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from PIL import Image
+from django.conf import settings
+from django.contrib.admin.sites import site
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, models
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import NotFound
+from rest_framework.test import APIClient, APIRequestFactory
+
+from .learning import bump_learning_version, lookup_correction
+from .models import FoodAnalysis, FoodDatabase, LearningCache, SystemStatistics, UserFeedback
+from .serializers import FoodAnalysisSerializer
+from .utils import enhanced_food_detector
+from .utils.batching import MicroBatcher
+from .utils.enhanced_food_detector import EnhancedFoodDetector
+from .utils.enhanced_nutrition_api import EnhancedNutritionAPI
+from .utils.image_processor import image_format_from_header
+from .admin import FoodAnalysisAdmin
+from .exceptions import ClassificationError, InvalidUploadError, handler
+from .views import AnalyzeFoodView, FeedbackView
+
+NUTRITION = {
+    'calories': 266, 'protein': 11, 'fat': 10, 'carbs': 33,
+    'fiber': 2.3, 'sugar': 3.6, 'sodium': 598, 'source': 'usda',
+}
+
+
+def png_bytes():
+    buffer = io.BytesIO()
+    Image.new('RGB', (8, 8), 'red').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class FakeDetector:
+    models = {'resnet50': None}
+    
+    def __init__(self, result=('Pizza', 90.0), error=None):
+        self.result = result
+        self.error = error
+    
+    def detect_food(self, image_file):
+        if self.error:
+            raise self.error
+        return self.result
+
+
+class FoodAnalysisModelTests(SimpleTestCase):
+    def test_primary_key_is_uuid(self):
+        self.assertIsInstance(FoodAnalysis._meta.pk, models.UUIDField)
+
+
+class MethodFieldFoodAnalysisSerializer(serializers.ModelSerializer):
+    """FoodAnalysisSerializer as it was built from SerializerMethodFields, for comparing output"""
+    macros = serializers.SerializerMethodField()
+    micros = serializers.SerializerMethodField()
+    serving = serializers.SerializerMethodField()
+    sources = serializers.SerializerMethodField()
+    image_url = serializers.SerializerMethodField()
+    analysis_metadata = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = FoodAnalysis
+        fields = [
+            'id', 'food_name', 'confidence', 'serving', 'calories_kcal',
+            'macros', 'micros', 'sources', 'image_url', 'analysis_metadata',
+            'created_at', 'processing_time'
+        ]
+    
+    def get_macros(self, obj):
+        return {
+            'protein_g': obj.protein_g or 0,
+            'fat_g': obj.fat_g or 0,
+            'carbs_g': obj.carbs_g or 0,
+            'fiber_g': obj.fiber_g or 0,
+        }
+    
+    def get_micros(self, obj):
+        return {
+            'sugar_g': obj.sugar_g or 0,
+            'sodium_mg': obj.sodium_mg or 0,
+            'calcium_mg': None,
+            'iron_mg': None,
+            'vitamin_c_mg': None,
+        }
+    
+    def get_sources(self, obj):
+        sources = ['Multi-Model AI Detection']
+        if obj.data_source:
+            source_map = {'usda': 'USDA FoodData Central', 'openfoodfacts': 'OpenFoodFacts Database'}
+            sources.append(source_map.get(obj.data_source, obj.data_source))
+        return sources
+    
+    def get_image_url(self, obj):
+        if obj.image:
+            request = self.context.get('request')
+            if request:
+                return request.build_absolute_uri(obj.image.url)
+        return None
+    
+    def get_serving(self, obj):
+        return obj.serving_size or "100g"
+    
+    def get_analysis_metadata(self, obj):
+        level = 'high' if obj.confidence >= 80 else 'medium' if obj.confidence >= 60 else 'low'
+        return {
+            'model_used': obj.model_used,
+            'processing_time': obj.processing_time,
+            'data_source': obj.data_source,
+            'confidence_level': level,
+        }
+
+
+class FoodAnalysisSerializerTests(TestCase):
+    def test_matches_method_field_serializer(self):
+        request = APIRequestFactory().get('/api/v1/recent/')
+        analyses = [
+            # Integral values as the view assigns them before the row is read back
+            FoodAnalysis.objects.create(
+                food_name='Pizza', confidence=85, calories_kcal=266, protein_g=11, fat_g=10,
+                sugar_g=3.6, model_used='ensemble', processing_time=2, data_source='usda',
+                image='food_images/pizza.jpg',
+            ),
+            FoodAnalysis.objects.create(food_name='Durian', confidence=42.5, serving_size='', data_source='local'),
+        ]
+        for analysis in analyses:
+            expected = MethodFieldFoodAnalysisSerializer(analysis, context={'request': request}).data
+            data = FoodAnalysisSerializer(analysis, context={'request': request}).data
+            self.assertEqual(data, expected)
+            self.assertEqual(list(data), list(expected))
+            self.assertEqual(list(data), FoodAnalysisSerializer.Meta.fields)
+            for key in ('confidence', 'calories_kcal', 'processing_time'):
+                self.assertIs(type(data[key]), type(expected[key]))
+
+
+class FoodAnalysisAdminTests(TestCase):
+    def setUp(self):
+        self.admin = FoodAnalysisAdmin(FoodAnalysis, site)
+        self.request = RequestFactory().get('/admin/food_analyzer/foodanalysis/')
+    
+    def add_analysis(self, feedbacks=0, confidence=85.0):
+        analysis = FoodAnalysis.objects.create(food_name='Pizza', confidence=confidence)
+        for _ in range(feedbacks):
+            UserFeedback.objects.create(
+                food_analysis=analysis, feedback_type='confirmation',
+                predicted_food='Pizza', original_confidence=confidence,
+            )
+        return analysis
+    
+    def test_feedback_counts_are_annotated(self):
+        self.add_analysis(feedbacks=2)
+        self.add_analysis()
+        
+        analyses = list(self.admin.get_queryset(self.request).order_by('_feedback_count'))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.admin.feedback_count(analyses[0]), '0 feedbacks')
+            self.assertIn('2 feedback(s)', self.admin.feedback_count(analyses[1]))
+    
+    def test_confidence_level_is_annotated(self):
+        for confidence in (59.9, 60.0, 79.9, 80.0):
+            self.add_analysis(confidence=confidence)
+        
+        analyses = self.admin.get_queryset(self.request).order_by('confidence')
+        self.assertEqual([analysis._confidence_level for analysis in analyses], ['low', 'medium', 'medium', 'high'])
+        # The change form's bare instance is bucketed the same way in Python
+        for analysis in analyses:
+            bare = FoodAnalysis.objects.get(pk=analysis.pk)
+            self.assertEqual(self.admin.confidence_level(bare), self.admin.confidence_level(analysis))
+    
+    def test_nutrition_summary_fragment_is_cached_until_edited(self):
+        cache.clear()
+        analysis = self.add_analysis()
+        html = self.admin.nutrition_summary(analysis)
+        with mock.patch('food_analyzer.admin.render_to_string', return_value=html) as render:
+            self.assertEqual(self.admin.nutrition_summary(analysis), html)
+            render.assert_not_called()
+            
+            analysis.calories_kcal = 300
+            analysis.save()
+            self.admin.nutrition_summary(analysis)
+            render.assert_called_once()
+    
+    def test_changelist_queries_dont_grow_with_rows(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        url = '/admin/food_analyzer/foodanalysis/'
+        self.add_analysis(feedbacks=1)
+        with CaptureQueriesContext(connection) as one_row:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        
+        for _ in range(3):
+            self.add_analysis(feedbacks=1)
+        with CaptureQueriesContext(connection) as four_rows:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(len(four_rows), len(one_row))
+
+
+class ImageFormatTests(SimpleTestCase):
+    def test_known_signatures(self):
+        self.assertEqual(image_format_from_header(png_bytes()), 'png')
+        self.assertEqual(image_format_from_header(b'\xff\xd8\xff\xe0\x00\x10JFIF'), 'jpeg')
+        self.assertEqual(image_format_from_header(b'RIFF\x24\x00\x00\x00WEBPVP8 '), 'webp')
+        self.assertEqual(image_format_from_header(b'\x00\x00\x00\x18ftypheic\x00\x00\x00\x00'), 'heif')
+        self.assertEqual(image_format_from_header(b'\x00\x00\x00\x1cftypavif\x00\x00\x00\x00'), 'avif')
+    
+    def test_other_formats_pil_knows_are_rejected(self):
+        self.assertIsNone(image_format_from_header(b'%!PS-Adobe-3.0 EPSF-3.0\n%%BoundingBox: 0 0 8 8\n'))
+        self.assertIsNone(image_format_from_header(b'P6\n8 8\n255\n' + b'\0' * 192))
+    
+    def test_non_image(self):
+        self.assertIsNone(image_format_from_header(b'#!/bin/sh\necho not an image\n'))
+
+
+class AnalyzeFoodViewTests(TestCase):
+    url = '/api/v1/analyze/'
+    
+    def setUp(self):
+        self.client = APIClient()
+        patches = [
+            mock.patch('food_analyzer.views.get_detector', return_value=FakeDetector()),
+            # Keep the background statistics worker off the test database
+            mock.patch('food_analyzer.views._STATS_POOL'),
+            mock.patch.object(AnalyzeFoodView.nutrition_api, 'get_comprehensive_nutrition', return_value=NUTRITION),
+            mock.patch.object(FileSystemStorage, '_save', lambda self, name, content: name),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+    
+    def post_image(self, content, name='meal.png'):
+        return self.client.post(self.url, {'image': SimpleUploadedFile(name, content)}, format='multipart')
+    
+    def test_image_upload_is_analyzed(self):
+        response = self.post_image(png_bytes())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['food_name'], 'Pizza')
+        self.assertEqual(response.data['calories_kcal'], 266)
+        self.assertEqual(FoodAnalysis.objects.count(), 1)
+    
+    def test_non_image_upload_is_rejected(self):
+        response = self.post_image(b'#!/bin/sh\necho not an image\n', name='meal.jpg')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': 'File must be an image'})
+        self.assertFalse(FoodAnalysis.objects.exists())
+    
+    def test_oversized_upload_is_rejected(self):
+        limits = {**settings.FOOD_DETECTION_SETTINGS, 'MAX_IMAGE_SIZE': 64}
+        with override_settings(FOOD_DETECTION_SETTINGS=limits):
+            response = self.post_image(png_bytes() + b'\0' * 128)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': 'Image file too large'})
+    
+    def test_missing_image(self):
+        response = self.client.post(self.url, {}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': 'No image file provided'})
+    
+    def test_classification_failure(self):
+        with mock.patch('food_analyzer.views.get_detector', return_value=FakeDetector(error=RuntimeError('boom'))):
+            response = self.post_image(png_bytes())
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.data, {'error': 'Food classification failed: boom'})
+    
+    def test_other_endpoints_keep_default_upload_handling(self):
+        # ImageUploadHandler is installed by AnalyzeFoodView only
+        response = self.client.post('/api/v1/foods/', {'food_name': 'notes', 'data_source': 'manual'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(hasattr(response.wsgi_request, 'upload_rejection'))
+
+
+class ExceptionHandlerTests(SimpleTestCase):
+    def test_invalid_upload(self):
+        response = handler(InvalidUploadError('No image file provided'), {})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': 'No image file provided'})
+    
+    def test_classification_error(self):
+        response = handler(ClassificationError('bad tensor'), {})
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.data, {'error': 'Food classification failed: bad tensor'})
+    
+    def test_api_exceptions_keep_drf_rendering(self):
+        response = handler(NotFound(), {})
+        self.assertEqual(response.status_code, 404)
+    
+    def test_unexpected_error_reports_processing_time(self):
+        view = mock.Mock(start_time=time.time() - 1)
+        with self.assertLogs('food_analyzer.exceptions', 'ERROR'):
+            response = handler(ValueError('oops'), {'view': view})
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.data['error'], 'Analysis failed: oops')
+        self.assertGreaterEqual(response.data['processing_time'], 1.0)
+
+
+class SystemStatisticsUpdateTests(TestCase):
+    def test_counters_and_rates_are_updated_in_place(self):
+        view = AnalyzeFoodView()
+        view._update_system_statistics(90.0, 1.0, 'usda')
+        view._update_system_statistics(50.0, 3.0, 'mock_data')
+        
+        stats = SystemStatistics.objects.get(date=timezone.now().date())
+        self.assertEqual(stats.total_predictions, 2)
+        self.assertEqual(stats.high_confidence_predictions, 1)
+        self.assertEqual(stats.medium_confidence_predictions, 0)
+        self.assertEqual(stats.low_confidence_predictions, 1)
+        self.assertAlmostEqual(stats.average_processing_time, 2.0)
+        self.assertEqual(stats.total_nutrition_searches, 2)
+        self.assertEqual(stats.successful_nutrition_searches, 1)
+        self.assertAlmostEqual(stats.nutrition_search_success_rate, 50.0)
+    
+    def test_skipped_lookup_is_not_counted_as_a_search(self):
+        view = AnalyzeFoodView()
+        view._update_system_statistics(90.0, 1.0, 'usda')
+        view._update_system_statistics(20.0, 1.0, 'fallback')
+        
+        stats = SystemStatistics.objects.get()
+        self.assertEqual(stats.total_predictions, 2)
+        self.assertEqual(stats.total_nutrition_searches, 1)
+        self.assertEqual(stats.successful_nutrition_searches, 1)
+        self.assertAlmostEqual(stats.nutrition_search_success_rate, 100.0)
+    
+    def test_bucket_accuracy_uses_incremented_count(self):
+        SystemStatistics.objects.create(high_confidence_predictions=1, high_confidence_correct=1)
+        AnalyzeFoodView._increment_system_statistics(timezone.now().date(), 95.0, 0.5, 'usda')
+        
+        stats = SystemStatistics.objects.get()
+        self.assertEqual(stats.high_confidence_predictions, 2)
+        self.assertAlmostEqual(stats.high_confidence_accuracy, 50.0)
+    
+    def test_missing_row_updates_nothing(self):
+        updated = AnalyzeFoodView._increment_system_statistics(timezone.now().date(), 70.0, 1.0, 'usda')
+        self.assertEqual(updated, 0)
+
+
+class FeedbackStatisticsTests(TestCase):
+    def record(self, feedback_type, confidence=90.0):
+        feedback = UserFeedback(feedback_type=feedback_type, predicted_food='pizza', original_confidence=confidence)
+        FeedbackView()._update_statistics_from_feedback(feedback)
+    
+    def test_confirmation_updates_only_feedback_counters(self):
+        SystemStatistics.objects.create(
+            total_predictions=4, high_confidence_predictions=2, average_processing_time=1.5
+        )
+        
+        with self.assertNumQueries(1):
+            self.record('confirmation')
+        
+        stats = SystemStatistics.objects.get()
+        self.assertEqual(stats.correct_predictions, 1)
+        self.assertEqual(stats.total_confirmations, 1)
+        self.assertEqual(stats.high_confidence_correct, 1)
+        self.assertAlmostEqual(stats.accuracy_rate, 25.0)
+        self.assertAlmostEqual(stats.high_confidence_accuracy, 50.0)
+        # Counters owned by the analysis path are left as the database has them
+        self.assertEqual(stats.total_predictions, 4)
+        self.assertEqual(stats.high_confidence_predictions, 2)
+        self.assertAlmostEqual(stats.average_processing_time, 1.5)
+    
+    def test_correction_creates_the_days_row(self):
+        self.record('correction')
+        stats = SystemStatistics.objects.get()
+        self.assertEqual(stats.total_corrections, 1)
+        self.assertEqual(stats.correct_predictions, 0)
+    
+    def test_confirmation_before_any_analysis_is_counted(self):
+        self.record('perfect', confidence=30.0)
+        stats = SystemStatistics.objects.get()
+        self.assertEqual(stats.correct_predictions, 1)
+        self.assertEqual(stats.low_confidence_correct, 1)
+        # No predictions counted yet, so the rates stay at zero instead of dividing by it
+        self.assertEqual(stats.accuracy_rate, 0.0)
+        self.assertEqual(stats.low_confidence_accuracy, 0.0)
+
+
+class MicroBatcherTests(SimpleTestCase):
+    def test_concurrent_requests_share_a_call(self):
+        calls = []
+        
+        def run(batch):
+            calls.append(len(batch['model']))
+            return {'model': batch['model'] * 2}
+        
+        batcher = MicroBatcher(run, window=0.2)
+        first = batcher.submit({'model': np.array([[1], [2]])})
+        second = batcher.submit({'model': np.array([[3]])})
+        
+        np.testing.assert_array_equal(first.result(timeout=5)['model'], [[2], [4]])
+        np.testing.assert_array_equal(second.result(timeout=5)['model'], [[6]])
+        self.assertEqual(calls, [3])
+    
+    def test_failure_reaches_every_request_in_the_batch(self):
+        def run(batch):
+            raise RuntimeError('inference failed')
+        
+        batcher = MicroBatcher(run, window=0.2)
+        futures = [batcher.submit({'model': np.zeros((1, 1))}) for _ in range(2)]
+        for future in futures:
+            with self.assertRaisesMessage(RuntimeError, 'inference failed'):
+                future.result(timeout=5)
+
+
+class RecentAnalysisPaginationTests(TestCase):
+    url = '/api/v1/recent/'
+    
+    def setUp(self):
+        self.client = APIClient()
+    
+    def test_cursor_walks_rows_sharing_a_timestamp(self):
+        for i in range(5):
+            FoodAnalysis.objects.create(food_name=f'food {i}', confidence=80.0)
+        FoodAnalysis.objects.update(created_at=timezone.now())
+        
+        seen = []
+        params = {'limit': 2}
+        while True:
+            data = self.client.get(self.url, params).data
+            seen += [analysis['id'] for analysis in data['analyses']]
+            if not data['next_before']:
+                break
+            params['before'] = data['next_before']
+        
+        expected = [str(pk) for pk in FoodAnalysis.objects.order_by('-id').values_list('id', flat=True)]
+        self.assertEqual(seen, expected)
+    
+    def test_malformed_cursor(self):
+        response = self.client.get(self.url, {'before': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+
+class FoodDatabaseViewTests(TestCase):
+    url = '/api/v1/foods/'
+    
+    def setUp(self):
+        self.client = APIClient()
+        for name in ('apple', 'banana', 'cherry', 'date', 'egg'):
+            FoodDatabase.objects.create(food_name=name, data_source='manual')
+    
+    def test_after_cursor(self):
+        first = self.client.get(self.url, {'limit': 2}).data
+        self.assertEqual([food['food_name'] for food in first['foods']], ['apple', 'banana'])
+        self.assertEqual(first['next_after'], 'banana')
+        
+        last = self.client.get(self.url, {'limit': 3, 'after': 'banana'}).data
+        self.assertEqual([food['food_name'] for food in last['foods']], ['cherry', 'date', 'egg'])
+        self.assertEqual(last['next_after'], 'egg')
+        
+        empty = self.client.get(self.url, {'limit': 3, 'after': 'egg'}).data
+        self.assertEqual(empty['foods'], [])
+        self.assertIsNone(empty['next_after'])
+    
+    def test_search_matches_alternative_names(self):
+        FoodDatabase.objects.create(food_name='aubergine', alternative_names=['eggplant'], data_source='manual')
+        data = self.client.get(self.url, {'search': 'EggP'}).data
+        self.assertEqual([food['food_name'] for food in data['foods']], ['aubergine'])
+    
+    def test_search_matches_food_name(self):
+        data = self.client.get(self.url, {'search': 'ERR'}).data
+        self.assertEqual([food['food_name'] for food in data['foods']], ['cherry'])
+
+
+class LearningCorrectionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.correction = LearningCache.objects.create(
+            predicted_food='hot dog', correct_food='sausage', average_original_confidence=70.0
+        )
+    
+    def test_lookup_is_memoised(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(lookup_correction('hot dog'), ('sausage', 1.15))
+            self.assertEqual(lookup_correction('hot dog'), ('sausage', 1.15))
+    
+    def test_bump_invalidates_memo(self):
+        lookup_correction('hot dog')
+        LearningCache.objects.filter(pk=self.correction.pk).update(correct_food='bratwurst')
+        self.assertEqual(lookup_correction('hot dog'), ('sausage', 1.15))
+        
+        bump_learning_version()
+        self.assertEqual(lookup_correction('hot dog'), ('bratwurst', 1.15))
+    
+    def test_missing_version_key_invalidates_memo(self):
+        lookup_correction('hot dog')
+        LearningCache.objects.filter(pk=self.correction.pk).delete()
+        cache.clear()
+        self.assertIsNone(lookup_correction('hot dog'))
+
+
+class NutritionSourceTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.api = EnhancedNutritionAPI()
+        self.api.google_fallback = False
+    
+    def sources(self, usda=None, openfoodfacts=None, usda_delay=0):
+        def search_usda(food_name):
+            time.sleep(usda_delay)
+            return usda
+        return mock.patch.multiple(
+            self.api,
+            search_nutrition_usda=search_usda,
+            search_nutrition_openfoodfacts=lambda food_name: openfoodfacts,
+        )
+    
+    def test_prefers_usda_answering_within_grace_period(self):
+        off = {**NUTRITION, 'source': 'openfoodfacts'}
+        with self.sources(usda=NUTRITION, openfoodfacts=off, usda_delay=0.05):
+            self.assertEqual(self.api.get_comprehensive_nutrition('pizza')['source'], 'usda')
+    
+    def test_falls_back_to_openfoodfacts(self):
+        off = {**NUTRITION, 'source': 'openfoodfacts'}
+        with self.sources(openfoodfacts=off):
+            self.assertEqual(self.api.get_comprehensive_nutrition('pizza')['source'], 'openfoodfacts')
+    
+    def test_queued_source_is_not_given_up(self):
+        # Other lookups hold the only worker for longer than a source's whole budget
+        self.api.timeout = (0, 0)
+        pool = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(pool.shutdown)
+        pool.submit(time.sleep, 1.2)
+        with mock.patch('food_analyzer.utils.enhanced_nutrition_api._SOURCE_POOL', pool), self.sources(usda=NUTRITION):
+            self.assertEqual(self.api.get_comprehensive_nutrition('pizza'), NUTRITION)
+    
+    def test_result_is_cached(self):
+        with self.sources(usda=NUTRITION):
+            self.api.get_comprehensive_nutrition('Pizza')
+        with self.sources():
+            self.assertEqual(self.api.get_comprehensive_nutrition('pizza'), NUTRITION)
+    
+    def test_mock_data_when_no_source_has_the_food(self):
+        with self.sources():
+            self.assertEqual(self.api.get_comprehensive_nutrition('french_fries')['source'], 'mock_data')
+            self.assertEqual(self.api.get_comprehensive_nutrition('durian')['source'], 'default_fallback')
+    
+    def test_zero_calorie_result_is_accepted(self):
+        water = {'calories': 0, 'protein': 0, 'fat': 0, 'carbs': 0, 'source': 'usda'}
+        with self.sources(usda=water):
+            self.assertEqual(self.api.get_comprehensive_nutrition('water'), water)
+    
+    def test_partial_google_result_is_accepted(self):
+        self.api.google_fallback = True
+        page = mock.Mock(status_code=200, text='Nutrition Facts: 52 calories, 14g carbohydrate')
+        with self.sources(), mock.patch.object(self.api.session, 'get', return_value=page):
+            nutrition = self.api.get_comprehensive_nutrition('apple')
+        
+        self.assertEqual(nutrition['source'], 'google_search')
+        self.assertEqual(nutrition['calories'], 52.0)
+        self.assertEqual(nutrition['carbs'], 14.0)
+        self.assertEqual(nutrition['protein'], 0)
+        self.assertEqual(nutrition['fat'], 0)
+
+
+class OnnxModelPathTests(SimpleTestCase):
+    def setUp(self):
+        model_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(model_dir.cleanup)
+        for filename in ('resnet50.onnx', 'resnet50_int8.onnx'):
+            open(os.path.join(model_dir.name, filename), 'wb').close()
+        patcher = mock.patch.object(enhanced_food_detector, 'ONNX_MODEL_DIR', model_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def model_path(self, on_gpu):
+        with mock.patch.object(enhanced_food_detector, '_onnx_runs_on_gpu', return_value=on_gpu):
+            return os.path.basename(enhanced_food_detector.onnx_model_path('resnet50'))
+    
+    def test_int8_export_on_cpu(self):
+        self.assertEqual(self.model_path(on_gpu=False), 'resnet50_int8.onnx')
+    
+    def test_fp32_export_on_gpu(self):
+        self.assertEqual(self.model_path(on_gpu=True), 'resnet50.onnx')
+    
+    def test_missing_export(self):
+        self.assertIsNone(enhanced_food_detector.onnx_model_path('inception_v3'))
+
+
+class DetectionCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        # The cache sits in front of the models, so none need loading
+        self.detector = EnhancedFoodDetector.__new__(EnhancedFoodDetector)
+        self.detector.models = {'resnet50': None}
+        self.detector.max_input_size = 224
+        patcher = mock.patch.object(self.detector, '_detect', return_value=('Pizza', 90.0))
+        self.detect = patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def image(self, size=(64, 64)):
+        gradient = np.repeat(np.linspace(0, 255, 64, dtype=np.uint8)[None, :, None], 64, axis=0)
+        return Image.fromarray(np.repeat(gradient, 3, axis=2)).resize(size)
+    
+    def test_near_duplicate_upload_uses_cached_detection(self):
+        self.assertEqual(self.detector.detect_food(self.image()), ('Pizza', 90.0))
+        self.assertEqual(self.detector.detect_food(self.image((96, 96))), ('Pizza', 90.0))
+        self.detect.assert_called_once()
+    
+    def test_cache_is_scoped_to_the_loaded_backbones(self):
+        self.detector.detect_food(self.image())
+        self.detector.models = {'resnet50': None, 'inception_v3': None}
+        self.detector.detect_food(self.image())
+        self.assertEqual(self.detect.call_count, 2)
+    
+    def test_failed_detection_is_not_cached(self):
+        self.detect.return_value = (None, None)
+        self.detector.detect_food(self.image())
+        self.detector.detect_food(self.image())
+        self.assertEqual(self.detect.call_count, 2)
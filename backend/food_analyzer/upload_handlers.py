@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+
+from .utils.image_processor import image_format_from_header
+
+
+class ImageUploadHandler(FileUploadHandler):
+    """Reject oversized or non-image uploads while they stream in, before they're buffered"""
+    
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.max_size = settings.FOOD_DETECTION_SETTINGS['MAX_IMAGE_SIZE']
+        # Clients may lie about the length, so it's only an early rejection, not the check
+        if self.content_length and self.content_length > self.max_size:
+            self._reject('Image file too large')
+    
+    def receive_data_chunk(self, raw_data, start):
+        if start == 0 and image_format_from_header(raw_data) is None:
+            self._reject('File must be an image')
+        self.received += len(raw_data)
+        if self.received > self.max_size:
+            self._reject('Image file too large')
+        # Pass the data on to the memory / temporary file handlers
+        return raw_data
+    
+    def file_complete(self, file_size):
+        return None
+    
+    def _reject(self, message):
+        # The view reports the reason; SkipFile drops the rest of this file unread
+        self.request.upload_rejection = message
+        raise SkipFile(message)
@@ -20,6 +20,8 @@ urlpatterns = [
     # Recent analyses
     path('recent/', views.RecentAnalysisView.as_view(), name='recent_analyses'),
     
-    # Health check endpoint
+    # Health check endpoints: liveness, and readiness (models, database, nutrition API)
     path('health/', views.HealthView.as_view(), name='health'),
+    path('health/live/', views.LivenessView.as_view(), name='health_live'),
+    path('health/ready/', views.ReadinessView.as_view(), name='health_ready'),
 ]
\ No newline at end of file
@@ -0,0 +1,73 @@
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Coalesce concurrent forward passes into one batched call on a worker thread"""
+
+    def __init__(self, run, max_requests=8, window=0.0):
+        # run takes {model_name: batch} and returns {model_name: predictions}
+        self.run = run
+        self.max_requests = max_requests
+        self.window = window
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._serve, name='food-batcher', daemon=True)
+        self._worker.start()
+
+    def submit(self, inputs):
+        """Queue one request's inputs and return a Future of its predictions"""
+        future = Future()
+        self._queue.put((inputs, future))
+        return future
+
+    def __call__(self, inputs):
+        return self.submit(inputs).result()
+
+    def _serve(self):
+        while True:
+            pending = [self._queue.get()]
+            # Take whatever queued up during the previous call, waiting at most `window`
+            deadline = time.monotonic() + self.window
+            while len(pending) < self.max_requests:
+                timeout = deadline - time.monotonic()
+                try:
+                    if timeout > 0:
+                        pending.append(self._queue.get(timeout=timeout))
+                    else:
+                        pending.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._run_batch(pending)
+
+    def _run_batch(self, pending):
+        # Only requests feeding the same models can share a call
+        groups = {}
+        for inputs, future in pending:
+            if future.set_running_or_notify_cancel():
+                groups.setdefault(tuple(inputs), []).append((inputs, future))
+
+        for names, group in groups.items():
+            try:
+                merged = {
+                    name: np.concatenate([inputs[name] for inputs, _ in group])
+                    for name in names
+                }
+                outputs = self.run(merged)
+
+                # Hand every request back its own rows
+                offsets = np.cumsum([len(inputs[names[0]]) for inputs, _ in group])[:-1]
+                split = {name: np.split(result, offsets) for name, result in outputs.items()}
+                for i, (_, future) in enumerate(group):
+                    future.set_result({name: parts[i] for name, parts in split.items()})
+            except Exception as e:
+                logger.error(f"Batched inference failed: {e}")
+                for _, future in group:
+                    if not future.done():
+                        future.set_exception(e)
@@ -5,17 +5,183 @@ from tensorflow.keras.applications import ResNet50, EfficientNetB3, InceptionV3
 from tensorflow.keras.applications.resnet import preprocess_input as resnet_preprocess
 from tensorflow.keras.applications.efficientnet import preprocess_input as efficientnet_preprocess
 from tensorflow.keras.applications.inception_v3 import preprocess_input as inception_preprocess
-from tensorflow.keras.applications.resnet import decode_predictions
-from tensorflow.keras.preprocessing import image
-from PIL import Image, ImageEnhance, ImageFilter
+from tensorflow.keras import mixed_precision
+from PIL import Image
 import os
+import re
+import json
+import mmap
 import logging
+import threading
 from collections import Counter
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
+from django.core.cache import cache
+from .batching import MicroBatcher
+from .http import session as http_session
+from .image_processor import InvalidImageError, perceptual_hash
+from .tflite import TFLiteModel
 
 logger = logging.getLogger(__name__)
 
+
+# CPU flags for native bf16 matmuls; without them bf16 is emulated and slower than float32
+NATIVE_BF16_FLAGS = {'avx512_bf16', 'amx_bf16'}
+
+
+def _cpu_has_native_bf16():
+    """Whether the CPU advertises bf16 instructions (Linux /proc/cpuinfo; False elsewhere)"""
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('flags'):
+                    return not NATIVE_BF16_FLAGS.isdisjoint(line.split(':', 1)[1].split())
+    except OSError:
+        pass
+    return False
+
+
+def _resolve_precision_policy():
+    """Keras dtype policy for the backbones; DETECTOR_PRECISION=float32 disables mixed precision"""
+    policy = os.getenv('DETECTOR_PRECISION', 'auto')
+    if policy == 'auto':
+        # fp16 for GPU tensor cores, bf16 only on CPUs with native bf16/AMX, float32 otherwise
+        if tf.config.list_physical_devices('GPU'):
+            return 'mixed_float16'
+        return 'mixed_bfloat16' if _cpu_has_native_bf16() else 'float32'
+    return policy
+
+
+# INT8 TFLite exports of the backbones (see the export_tflite_models command)
+TFLITE_MODEL_DIR = os.getenv(
+    'DETECTOR_TFLITE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'models', 'tflite')
+)
+
+# ONNX exports of the backbones (see the export_onnx_models command), served by ONNX Runtime
+ONNX_MODEL_DIR = os.getenv(
+    'DETECTOR_ONNX_DIR',
+    os.path.join(os.path.dirname(TFLITE_MODEL_DIR), 'onnx')
+)
+# Dynamically quantized INT8 ops have no CUDA / TensorRT kernels and would fall back to the CPU there
+ONNX_GPU_PROVIDERS = frozenset({'CUDAExecutionProvider', 'TensorrtExecutionProvider'})
+
+# Detections are cached by perceptual hash so re-uploads of the same photo skip the models
+DETECTION_CACHE_TIMEOUT = int(os.getenv('DETECTOR_CACHE_TIMEOUT', str(7 * 24 * 60 * 60)))  # 7 days
+
+BACKBONES = {
+    'resnet50': ResNet50,
+    'efficientnet': EfficientNetB3,
+    'inception': InceptionV3,
+}
+
+PREPROCESSORS = {
+    'resnet50': resnet_preprocess,
+    'efficientnet': efficientnet_preprocess,
+    'inception': inception_preprocess,
+}
+
+
+IMAGENET_CLASS_INDEX_URL = 'https://storage.googleapis.com/download.tensorflow.org/data/imagenet_class_index.json'
+_imagenet_classes = None
+
+
+def _imagenet_class_index():
+    """(wnid, label) per ImageNet class id, downloaded and parsed once per process"""
+    global _imagenet_classes
+    if _imagenet_classes is None:
+        path = tf.keras.utils.get_file(
+            'imagenet_class_index.json',
+            IMAGENET_CLASS_INDEX_URL,
+            cache_subdir='models',
+            file_hash='c2c37ea517e94d9795004a39431a14cb',
+        )
+        with open(path) as f:
+            class_index = json.load(f)
+        _imagenet_classes = [tuple(class_index[str(i)]) for i in range(len(class_index))]
+    return _imagenet_classes
+
+
+def decode_predictions(preds, top=5):
+    """Top-k (wnid, label, score) per row, as keras' decode_predictions but vectorised"""
+    classes = _imagenet_class_index()
+    preds = np.asarray(preds)
+    
+    # Partial selection of the top k, then sort only those k
+    top_indices = np.argpartition(-preds, top - 1, axis=1)[:, :top]
+    top_scores = np.take_along_axis(preds, top_indices, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind='stable')
+    top_indices = np.take_along_axis(top_indices, order, axis=1).tolist()
+    top_scores = np.take_along_axis(top_scores, order, axis=1).tolist()
+    
+    return [
+        [(*classes[index], score) for index, score in zip(row_indices, row_scores)]
+        for row_indices, row_scores in zip(top_indices, top_scores)
+    ]
+
+
+def tflite_model_path(model_name):
+    """Path of the INT8 export for a backbone, or None when it hasn't been exported"""
+    path = os.path.join(TFLITE_MODEL_DIR, f'{model_name}_int8.tflite')
+    return path if os.path.exists(path) else None
+
+
+def _onnx_runs_on_gpu():
+    """Whether onnxruntime has a CUDA or TensorRT provider to run the backbones on"""
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        return False
+    return not ONNX_GPU_PROVIDERS.isdisjoint(ort.get_available_providers())
+
+
+def onnx_model_path(model_name):
+    """Path of the ONNX export for a backbone, or None when it hasn't been exported; INT8 is preferred on CPU only"""
+    filenames = [f'{model_name}.onnx']
+    if not _onnx_runs_on_gpu():
+        filenames.insert(0, f'{model_name}_int8.onnx')
+    for filename in filenames:
+        path = os.path.join(ONNX_MODEL_DIR, filename)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+# PIL's ImageFilter.SHARPEN kernel
+SHARPEN_KERNEL = np.array([
+    [-2, -2, -2],
+    [-2, 32, -2],
+    [-2, -2, -2],
+], dtype=np.float32) / 16
+
+
+def _enhance_contrast(arr, factor):
+    """ImageEnhance.Contrast on an RGB array: blend away from the mean grey level"""
+    mean = int(cv2.mean(cv2.cvtColor(arr, cv2.COLOR_RGB2GRAY))[0] + 0.5)
+    return cv2.addWeighted(arr, factor, arr, 0, (1 - factor) * mean)
+
+
+def _enhance_brightness(arr, factor):
+    """ImageEnhance.Brightness on an RGB array"""
+    return cv2.addWeighted(arr, factor, arr, 0, 0)
+
+
+def _sharpen(arr):
+    """ImageFilter.SHARPEN on an RGB array, leaving the 1px border untouched as PIL does"""
+    sharp = cv2.filter2D(arr, -1, SHARPEN_KERNEL)
+    sharp[[0, -1]] = arr[[0, -1]]
+    sharp[:, [0, -1]] = arr[:, [0, -1]]
+    return sharp
+
+
+# OpenCV releases the GIL inside its kernels, so the variations can be built concurrently
+_PREP_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix='food-prep')
+# Backbones outside the single Keras graph (ONNX / TFLite) run side by side; both release the GIL
+_MODEL_POOL = ThreadPoolExecutor(max_workers=len(BACKBONES), thread_name_prefix='food-model')
+# ONNX sessions running there side by side split the cores instead of each starting a thread per core
+ONNX_INTRA_OP_THREADS = max(1, (os.cpu_count() or 1) // len(BACKBONES))
+
+
 class EnhancedFoodDetector:
     """Enhanced food detector using multiple AI models for better accuracy"""
     
@@ -24,10 +190,25 @@ class EnhancedFoodDetector:
         
         # Load multiple pre-trained models
         self.models = {}
+        self.predict_fns = {}
+        self.ensemble_fn = None
         self.load_models()
+        # Largest side any backbone takes (InceptionV3 299, EfficientNetB3 300)
+        self.max_input_size = max(max(model.input_shape[1:3]) for model in self.models.values())
+        
+        # Concurrent requests share forward passes instead of each running at batch size 4
+        self.batcher = MicroBatcher(
+            self._run_models,
+            max_requests=int(os.getenv('DETECTOR_MAX_BATCH_REQUESTS', '8')),
+            window=float(os.getenv('DETECTOR_BATCH_WINDOW_MS', '0')) / 1000,
+        )
         
         # Enhanced food keywords with more specific categories
         self.food_keywords = self.load_comprehensive_food_keywords()
+        # One alternation pattern instead of a substring test per keyword
+        self._food_re = re.compile('|'.join(
+            re.escape(word.replace('_', ' ')) for word in sorted(self.food_keywords)
+        ))
         
         # Model weights for ensemble prediction
         self.model_weights = {
@@ -38,15 +219,38 @@ class EnhancedFoodDetector:
         
     def load_models(self):
         """Load multiple pre-trained models"""
+        # Scope the dtype policy to our backbones so other Keras models keep float32
+        previous_policy = mixed_precision.global_policy()
+        mixed_precision.set_global_policy(_resolve_precision_policy())
+        try:
+            self._load_backbones()
+        finally:
+            mixed_precision.set_global_policy(previous_policy)
+        
+        # With only Keras backbones, run every forward pass in one graph call
+        self.ensemble_fn = None
+        if len(self.models) > 1 and all(isinstance(m, tf.keras.Model) for m in self.models.values()):
+            self.ensemble_fn = self._compile_ensemble_fn(list(self.models.values()))
+            return
+        
+        for model_name, model in self.models.items():
+            if not isinstance(model, tf.keras.Model):
+                # ONNX / TFLite models are already callable on a batch
+                self.predict_fns[model_name] = model
+            else:
+                self.predict_fns[model_name] = self._compile_predict_fn(model)
+    
+    def _load_backbones(self):
+        """Build the ImageNet backbones, falling back to ResNet50 alone"""
         try:
             logger.info("Loading ResNet50...")
-            self.models['resnet50'] = ResNet50(weights='imagenet', include_top=True)
+            self.models['resnet50'] = self._build_backbone('resnet50')
             
             logger.info("Loading EfficientNetB3...")
-            self.models['efficientnet'] = EfficientNetB3(weights='imagenet', include_top=True)
+            self.models['efficientnet'] = self._build_backbone('efficientnet')
             
             logger.info("Loading InceptionV3...")
-            self.models['inception'] = InceptionV3(weights='imagenet', include_top=True)
+            self.models['inception'] = self._build_backbone('inception')
             
             logger.info("✅ All models loaded successfully!")
             
@@ -54,13 +258,64 @@ class EnhancedFoodDetector:
             logger.error(f"Error loading models: {e}")
             # Fallback to single model
             try:
-                self.models['resnet50'] = ResNet50(weights='imagenet', include_top=True)
+                self.models['resnet50'] = self._build_backbone('resnet50')
                 self.model_weights = {'resnet50': 1.0}
                 logger.info("Fallback: Using only ResNet50")
             except Exception as fallback_error:
                 logger.error(f"Fallback model loading failed: {fallback_error}")
                 raise
     
+    @staticmethod
+    def _build_backbone(model_name):
+        """Prefer the ONNX export of a backbone, then its INT8 TFLite export, else build the Keras model"""
+        onnx_path = onnx_model_path(model_name)
+        if onnx_path:
+            try:
+                from .onnx_model import ONNXModel
+                logger.info(f"Using ONNX model {onnx_path}")
+                return ONNXModel(onnx_path, intra_op_threads=ONNX_INTRA_OP_THREADS)
+            except ImportError:
+                logger.warning("onnxruntime not available, trying the other model formats")
+            except Exception as e:
+                logger.error(f"Error loading ONNX model {onnx_path}: {e}, trying the other model formats")
+        
+        tflite_path = tflite_model_path(model_name)
+        if tflite_path:
+            logger.info(f"Using INT8 TFLite model {tflite_path}")
+            return TFLiteModel(tflite_path)
+        return BACKBONES[model_name](weights='imagenet', include_top=True)
+    
+    @staticmethod
+    def _compile_predict_fn(model):
+        """Trace the model once for its native input shape, skipping Keras predict() overhead"""
+        height, width = model.input_shape[1:3]
+        return tf.function(
+            # Softmax may come out in bf16/fp16 under mixed precision
+            lambda batch: tf.cast(model(batch, training=False), tf.float32),
+            input_signature=[tf.TensorSpec(shape=(None, height, width, 3), dtype=tf.float32)],
+        ).get_concrete_function()
+    
+    @staticmethod
+    def _compile_ensemble_fn(models):
+        """Trace all backbones into one graph taking a batch per model at its native size"""
+        input_signature = [
+            tf.TensorSpec(shape=(None, *model.input_shape[1:3], 3), dtype=tf.float32)
+            for model in models
+        ]
+        
+        def ensemble(*batches):
+            # The forward passes are independent, so TF's executor runs them in parallel
+            return [
+                tf.cast(model(batch, training=False), tf.float32)
+                for model, batch in zip(models, batches)
+            ]
+        
+        # XLA is opt-in: on CPU it compiles slowly and runs slower than the stock kernels
+        jit_compile = os.getenv('DETECTOR_XLA', 'False').lower() in ('true', '1')
+        return tf.function(
+            ensemble, input_signature=input_signature, jit_compile=jit_compile
+        ).get_concrete_function()
+    
     def load_comprehensive_food_keywords(self):
         """Load comprehensive food keywords organized by categories"""
         return {
@@ -107,72 +362,121 @@ class EnhancedFoodDetector:
     
     def preprocess_image_enhanced(self, img_input):
         """Enhanced image preprocessing with multiple techniques"""
+        img = self.load_image(img_input)
+        if img is None:
+            return None, None
+        try:
+            return self.image_variations(img), img
+        except Exception as e:
+            logger.error(f"Error preprocessing image: {e}")
+            return None, None
+    
+    def load_image(self, img_input):
+        """Decode an upload, path, URL or PIL image to a loaded RGB image, or None"""
+        mapped = None
         try:
             # Load image
             if isinstance(img_input, str):
                 if img_input.startswith('http'):
-                    response = requests.get(img_input, timeout=10)
+                    response = http_session.get(img_input, timeout=10)
                     img = Image.open(BytesIO(response.content))
                 else:
                     img = Image.open(img_input)
             else:
+                temporary_file_path = getattr(img_input, 'temporary_file_path', None)
+                if temporary_file_path:
+                    # Large uploads are spooled to disk; map the file instead of copying it into memory
+                    with open(temporary_file_path(), 'rb') as f:
+                        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    img = Image.open(mapped)
                 # Handle Django UploadedFile or similar
-                if hasattr(img_input, 'read'):
+                elif hasattr(img_input, 'read'):
                     img_input.seek(0)
                     img = Image.open(img_input)
                 else:
                     img = img_input
             
+            # JPEGs far larger than the biggest backbone input are decoded at 1/2, 1/4 or 1/8
+            # scale by libjpeg itself, which also shrinks the enhancement passes
+            img.draft('RGB', (self.max_input_size, self.max_input_size))
             if img.mode != 'RGB':
                 img = img.convert('RGB')
-            
-            # Apply image enhancements
-            enhanced_images = []
-            
-            # Original image
-            enhanced_images.append(('original', img))
-            
-            # Enhanced contrast
-            enhancer = ImageEnhance.Contrast(img)
-            enhanced_images.append(('contrast', enhancer.enhance(1.2)))
-            
-            # Enhanced brightness
-            enhancer = ImageEnhance.Brightness(img)
-            enhanced_images.append(('brightness', enhancer.enhance(1.1)))
-            
-            # Sharpened
-            enhanced_images.append(('sharp', img.filter(ImageFilter.SHARPEN)))
-            
-            return enhanced_images, img
+            # Decode up front so the worker threads only ever read the pixel data
+            img.load()
+            return img
             
         except Exception as e:
-            logger.error(f"Error preprocessing image: {e}")
-            return None, None
+            logger.error(f"Error loading image: {e}")
+            return None
+        finally:
+            # Pixel data is fully decoded by now, so the mapping can go
+            if mapped is not None:
+                mapped.close()
+    
+    def image_variations(self, img):
+        """The original image plus its contrast, brightness and sharpened variations"""
+        # Apply image enhancements with OpenCV's vectorised kernels
+        arr = np.asarray(img)
+        contrast = _PREP_POOL.submit(_enhance_contrast, arr, 1.2)
+        brightness = _PREP_POOL.submit(_enhance_brightness, arr, 1.1)
+        sharp = _PREP_POOL.submit(_sharpen, arr)
+        
+        return [
+            ('original', img),
+            ('contrast', Image.fromarray(contrast.result())),
+            ('brightness', Image.fromarray(brightness.result())),
+            ('sharp', Image.fromarray(sharp.result())),
+        ]
+    
+    def warm_up(self):
+        """Run a blank image through every model so the first request skips graph and buffer setup"""
+        blank = Image.new('RGB', (self.max_input_size, self.max_input_size))
+        # Same batch size as a real request, so TFLite doesn't have to reallocate later
+        self.get_model_predictions([(name, blank) for name in ('original', 'contrast', 'brightness', 'sharp')])
     
     def get_model_predictions(self, img_variations):
         """Get predictions from all models on image variations"""
         all_predictions = []
+        # Resized float32 batches keyed by (width, height), shared by models of the same size
+        batches = {}
+        inputs = {}
         
         for model_name, model in self.models.items():
-            for variation_name, img in img_variations:
-                try:
-                    # Preprocess based on model type
-                    img_array = img.resize((224, 224))
-                    img_array = image.img_to_array(img_array)
-                    img_array = np.expand_dims(img_array, axis=0)
-                    
-                    if model_name == 'resnet50':
-                        img_array = resnet_preprocess(img_array)
-                    elif model_name == 'efficientnet':
-                        img_array = efficientnet_preprocess(img_array)
-                    elif model_name == 'inception':
-                        img_array = inception_preprocess(img_array)
-                    
-                    # Get predictions
-                    predictions = model.predict(img_array, verbose=0)
-                    decoded = decode_predictions(predictions, top=10)[0]
-                    
-                    # Store predictions with metadata
+            try:
+                # Each backbone has its own native input size (224 / 300 / 299)
+                height, width = model.input_shape[1:3]
+                
+                # Resize and array all variations once into a batch for a single forward pass
+                batch = batches.get((width, height))
+                if batch is None:
+                    batch = batches[(width, height)] = np.stack([
+                        np.asarray(img.resize((width, height)), dtype=np.float32)
+                        for _, img in img_variations
+                    ])
+                
+                preprocess = PREPROCESSORS.get(model_name)
+                if preprocess is not None:
+                    # preprocess_input works in place, so leave the cached batch untouched
+                    batch = preprocess(batch.copy())
+                inputs[model_name] = batch
+                
+            except Exception as e:
+                logger.error(f"Error preparing input for {model_name}: {e}")
+        
+        outputs = {}
+        if inputs:
+            try:
+                outputs = self.batcher(inputs)
+            except Exception as e:
+                logger.error(f"Error running models: {e}")
+        
+        for model_name, predictions in outputs.items():
+            try:
+                decoded_batch = decode_predictions(predictions, top=10)
+                weight = self.model_weights.get(model_name, 0.33)
+                
+                # Store predictions with metadata
+                for (variation_name, _), decoded in zip(img_variations, decoded_batch):
                     for rank, (class_id, class_name, confidence) in enumerate(decoded):
                         all_predictions.append({
                             'model': model_name,
@@ -180,59 +484,79 @@ class EnhancedFoodDetector:
                             'rank': rank,
                             'class_name': class_name,
                             'confidence': float(confidence),
-                            'weight': self.model_weights.get(model_name, 0.33)
+                            'weight': weight
                         })
-                        
-                except Exception as e:
-                    logger.error(f"Error getting predictions from {model_name}: {e}")
-                    continue
+                    
+            except Exception as e:
+                logger.error(f"Error getting predictions from {model_name}: {e}")
+                continue
         
         return all_predictions
     
+    def _run_models(self, inputs):
+        """Run each model on its batch, returning predictions for the models that succeeded"""
+        if self.ensemble_fn is not None and len(inputs) == len(self.models):
+            try:
+                results = self.ensemble_fn(*(tf.constant(inputs[name]) for name in self.models))
+                return {name: np.asarray(result) for name, result in zip(self.models, results)}
+            except Exception as e:
+                logger.error(f"Error running ensemble graph: {e}")
+        
+        if len(inputs) == 1:
+            predictions = {name: self._predict_model(name, batch) for name, batch in inputs.items()}
+        else:
+            # The batcher's single worker is the only caller, so each model still runs one batch at a time
+            futures = {name: _MODEL_POOL.submit(self._predict_model, name, batch) for name, batch in inputs.items()}
+            predictions = {name: future.result() for name, future in futures.items()}
+        return {name: result for name, result in predictions.items() if result is not None}
+    
+    def _predict_model(self, model_name, batch):
+        """One model's predictions on its batch, or None if it failed"""
+        try:
+            predict_fn = self.predict_fns.get(model_name)
+            if predict_fn is not None and not isinstance(self.models[model_name], tf.keras.Model):
+                # ONNX / TFLite take the NumPy batch as is
+                return np.asarray(predict_fn(batch))
+            if predict_fn is not None:
+                return np.asarray(predict_fn(tf.constant(batch, dtype=tf.float32)))
+            return self.models[model_name].predict(batch, verbose=0)
+        except Exception as e:
+            logger.error(f"Error getting predictions from {model_name}: {e}")
+        return None
+    
     def ensemble_prediction(self, all_predictions):
         """Combine predictions from all models using weighted ensemble"""
-        # Group predictions by class name
-        class_scores = {}
+        if not all_predictions:
+            return []
         
-        for pred in all_predictions:
-            class_name = pred['class_name']
-            confidence = pred['confidence']
-            weight = pred['weight']
-            
-            # Weight by model confidence and model weight
-            weighted_score = confidence * weight
-            
-            if class_name in class_scores:
-                class_scores[class_name]['total_score'] += weighted_score
-                class_scores[class_name]['count'] += 1
-                class_scores[class_name]['max_confidence'] = max(
-                    class_scores[class_name]['max_confidence'], confidence
-                )
-            else:
-                class_scores[class_name] = {
-                    'total_score': weighted_score,
-                    'count': 1,
-                    'max_confidence': confidence
-                }
-        
-        # Calculate final scores
-        final_predictions = []
-        for class_name, data in class_scores.items():
-            # Average weighted score with bonus for multiple model agreement
-            avg_score = data['total_score'] / data['count']
-            agreement_bonus = min(data['count'] / len(self.models), 1.0) * 0.1
-            final_score = avg_score + agreement_bonus
-            
-            final_predictions.append({
-                'class_name': class_name,
-                'confidence': final_score,
-                'max_confidence': data['max_confidence'],
-                'model_agreement': data['count']
-            })
-        
-        # Sort by confidence
-        final_predictions.sort(key=lambda x: x['confidence'], reverse=True)
-        return final_predictions
+        # Group predictions by class name (vectorised)
+        names = np.array([pred['class_name'] for pred in all_predictions])
+        confidences = np.array([pred['confidence'] for pred in all_predictions], dtype=np.float64)
+        weights = np.array([pred['weight'] for pred in all_predictions], dtype=np.float64)
+        
+        classes, first_seen, inverse = np.unique(names, return_index=True, return_inverse=True)
+        
+        # Weight by model confidence and model weight
+        total_scores = np.bincount(inverse, weights=confidences * weights)
+        counts = np.bincount(inverse)
+        max_confidences = np.zeros(len(classes))
+        np.maximum.at(max_confidences, inverse, confidences)
+        
+        # Average weighted score with bonus for multiple model agreement
+        agreement_bonus = np.minimum(counts / len(self.models), 1.0) * 0.1
+        final_scores = total_scores / counts + agreement_bonus
+        
+        # Sort by confidence; ties keep first-seen order
+        order = np.lexsort((first_seen, -final_scores))
+        return [
+            {
+                'class_name': str(classes[i]),
+                'confidence': float(final_scores[i]),
+                'max_confidence': float(max_confidences[i]),
+                'model_agreement': int(counts[i])
+            }
+            for i in order
+        ]
     
     def extract_food_predictions(self, ensemble_results):
         """Extract food-related predictions from ensemble results"""
@@ -240,10 +564,7 @@ class EnhancedFoodDetector:
         
         for pred in ensemble_results:
             class_name = pred['class_name']
-            is_food = any(food_word in class_name.lower().replace('_', ' ') 
-                         for food_word in self.food_keywords)
-            
-            if is_food:
+            if self._food_re.search(class_name.lower().replace('_', ' ')):
                 food_predictions.append({
                     'class_name': class_name.replace('_', ' ').title(),
                     'confidence': pred['confidence'] * 100,  # Convert to percentage
@@ -257,10 +578,36 @@ class EnhancedFoodDetector:
         """Main food detection method with enhanced accuracy"""
         logger.info("🔍 Analyzing image with multiple AI models...")
         
-        # Preprocess image
-        img_variations, original_img = self.preprocess_image_enhanced(img_input)
-        if not img_variations:
-            return None, None
+        img = self.load_image(img_input)
+        if img is None:
+            raise InvalidImageError("Could not decode image")
+        
+        # Near-duplicate uploads (retries, re-encodes) get the stored result without a forward pass
+        cache_key = self._detection_cache_key(img)
+        try:
+            cached = cache.get(cache_key)
+        except Exception as e:
+            logger.warning(f"Detection cache unavailable: {e}")
+            cached = None
+        if cached is not None:
+            logger.info(f"Using cached detection: {cached[0]}")
+            return cached
+        
+        result = self._detect(img)
+        if result[0] is not None:
+            try:
+                cache.set(cache_key, result, DETECTION_CACHE_TIMEOUT)
+            except Exception as e:
+                logger.warning(f"Could not cache detection: {e}")
+        return result
+    
+    def _detection_cache_key(self, img):
+        # Scoped to the loaded backbones, whose ensemble produced the result
+        return f"detection:{'+'.join(self.models)}:{perceptual_hash(np.asarray(img))}"
+    
+    def _detect(self, img):
+        """Run the ensemble on a decoded image"""
+        img_variations = self.image_variations(img)
         
         # Get predictions from all models
         all_predictions = self.get_model_predictions(img_variations)
@@ -285,4 +632,19 @@ class EnhancedFoodDetector:
                    f"({top_prediction['confidence']:.1f}% confidence, "
                    f"{top_prediction['model_agreement']} models agreed)")
         
-        return top_prediction['class_name'], top_prediction['confidence']
\ No newline at end of file
+        return top_prediction['class_name'], top_prediction['confidence']
+
+
+# Process-wide detector; the backbones are only loaded once per worker
+_detector = None
+_detector_lock = threading.Lock()
+
+
+def get_detector():
+    """Return the shared EnhancedFoodDetector, loading it on first use"""
+    global _detector
+    if _detector is None:
+        with _detector_lock:
+            if _detector is None:
+                _detector = EnhancedFoodDetector()
+    return _detector
@@ -1,16 +1,116 @@
-import requests
 import os
+import time
 import logging
 import urllib.parse
+from functools import lru_cache
 import re
 import json
-from bs4 import BeautifulSoup
 from dotenv import load_dotenv
-from datetime import datetime
+from django.core.cache import cache
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from .http import parse_json, session
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+# Fan-out pool for the nutrition sources, shared by all lookups in the process
+_SOURCE_POOL = ThreadPoolExecutor(max_workers=9, thread_name_prefix='nutrition-source')
+
+# Nutrient patterns scraped from Google result pages
+CALORIES_RE = re.compile(r'(\d+)\s*(?:calories|kcal|cal)', re.IGNORECASE)
+PROTEIN_RE = re.compile(r'(\d+(?:\.\d+)?)\s*g?\s*protein', re.IGNORECASE)
+CARBS_RE = re.compile(r'(\d+(?:\.\d+)?)\s*g?\s*(?:carb|carbohydrate)', re.IGNORECASE)
+FAT_RE = re.compile(r'(\d+(?:\.\d+)?)\s*g?\s*(?:fat|lipid)', re.IGNORECASE)
+
+# Knowledge-panel heading, and how much of the page around it the patterns scan.
+# Case-sensitive so the lower-cased query echoed in <title> doesn't match.
+NUTRITION_PANEL_ANCHOR = 'Nutrition Facts'
+NUTRITION_PANEL_BEFORE = 2000
+NUTRITION_PANEL_AFTER = 8000
+
+# USDA nutrient-name fragments and the nutrition key each one fills
+USDA_NUTRIENT_KEYS = {
+    'energy': 'calories',
+    'protein': 'protein',
+    'total lipid': 'fat',
+    'fat': 'fat',
+    'carbohydrate': 'carbs',
+    'fiber': 'fiber',
+    'sugar': 'sugar',
+    'sodium': 'sodium',
+}
+USDA_NUTRIENT_RE = re.compile('|'.join(map(re.escape, USDA_NUTRIENT_KEYS)))
+USDA_NUTRIENT_COUNT = len(set(USDA_NUTRIENT_KEYS.values()))
+
+
+def extract_usda_nutrients(usda_data):
+    """Map a USDA food record's foodNutrients onto our keys; the first entry for each key wins"""
+    found = {}
+    for nutrient in usda_data.get('foodNutrients', ()):
+        if 'nutrient' in nutrient:
+            # /food/{fdc_id} shape: nested nutrient object and 'amount'
+            details = nutrient['nutrient']
+            nutrient_name = f"{details.get('name', '')} {details.get('unitName', '')}".lower()
+            value = nutrient.get('amount', 0)
+        else:
+            # /foods/search shape: flattened nutrientName/unitName and 'value'
+            nutrient_name = f"{nutrient.get('nutrientName', '')} {nutrient.get('unitName', '')}".lower()
+            value = nutrient.get('value', 0)
+        
+        match = USDA_NUTRIENT_RE.search(nutrient_name)
+        if match is None:
+            continue
+        key = USDA_NUTRIENT_KEYS[match.group()]
+        if key == 'calories' and 'kcal' not in nutrient_name:
+            continue
+        if key not in found:
+            found[key] = value
+            if len(found) == USDA_NUTRIENT_COUNT:
+                break
+    return found
+
+
+# Shared nutrition lookups (Redis when REDIS_URL is configured)
+NUTRITION_CACHE_TIMEOUT = 7 * 24 * 60 * 60  # 7 days
+
+# Sources only return a result when they reported at least one of these; zeros are real values
+MACRO_KEYS = ('calories', 'protein', 'carbs', 'fat')
+
+# How long a running preferred source may still answer once a lower-preference one has
+SOURCE_GRACE_PERIOD = 0.15
+
+# Built-in per-100g values used when no live source has the food
+MOCK_NUTRITION = {
+    'pizza': {'calories': 266, 'protein': 11, 'fat': 10, 'carbs': 33, 'fiber': 2.3, 'sugar': 3.6, 'sodium': 598},
+    'hamburger': {'calories': 295, 'protein': 17, 'fat': 14, 'carbs': 28, 'fiber': 2.1, 'sugar': 4.0, 'sodium': 396},
+    'burger': {'calories': 295, 'protein': 17, 'fat': 14, 'carbs': 28, 'fiber': 2.1, 'sugar': 4.0, 'sodium': 396},
+    'sushi': {'calories': 200, 'protein': 9, 'fat': 7, 'carbs': 28, 'fiber': 1.0, 'sugar': 2.0, 'sodium': 400},
+    'chocolate cake': {'calories': 371, 'protein': 4, 'fat': 16, 'carbs': 56, 'fiber': 3.0, 'sugar': 45, 'sodium': 320},
+    'cake': {'calories': 371, 'protein': 4, 'fat': 16, 'carbs': 56, 'fiber': 3.0, 'sugar': 45, 'sodium': 320},
+    'french fries': {'calories': 365, 'protein': 4, 'fat': 17, 'carbs': 48, 'fiber': 4.0, 'sugar': 0.3, 'sodium': 400},
+    'fries': {'calories': 365, 'protein': 4, 'fat': 17, 'carbs': 48, 'fiber': 4.0, 'sugar': 0.3, 'sodium': 400},
+    'chicken': {'calories': 239, 'protein': 27, 'fat': 14, 'carbs': 0, 'fiber': 0, 'sugar': 0, 'sodium': 82},
+    'ice cream': {'calories': 207, 'protein': 4, 'fat': 11, 'carbs': 24, 'fiber': 0.5, 'sugar': 21, 'sodium': 80},
+    'apple': {'calories': 52, 'protein': 0.3, 'fat': 0.2, 'carbs': 14, 'fiber': 2.4, 'sugar': 10.4, 'sodium': 1},
+    'banana': {'calories': 89, 'protein': 1.1, 'fat': 0.3, 'carbs': 23, 'fiber': 2.6, 'sugar': 12.2, 'sodium': 1},
+    'rice': {'calories': 130, 'protein': 2.7, 'fat': 0.3, 'carbs': 28, 'fiber': 0.4, 'sugar': 0.1, 'sodium': 5},
+    'bread': {'calories': 265, 'protein': 9, 'fat': 3.2, 'carbs': 49, 'fiber': 2.7, 'sugar': 5.7, 'sodium': 491},
+    'pasta': {'calories': 131, 'protein': 5, 'fat': 1.1, 'carbs': 25, 'fiber': 1.8, 'sugar': 0.8, 'sodium': 6},
+    'salad': {'calories': 15, 'protein': 1.4, 'fat': 0.1, 'carbs': 3, 'fiber': 1.3, 'sugar': 1.5, 'sodium': 28},
+}
+
+DEFAULT_NUTRITION = {
+    'calories': 200,
+    'protein': 10,
+    'fat': 8,
+    'carbs': 25,
+    'fiber': 2,
+    'sugar': 5,
+    'sodium': 100,
+    'source': 'default_fallback'
+}
+
+
 class EnhancedNutritionAPI:
     """Enhanced nutrition API with multiple data sources"""
     
@@ -20,10 +120,11 @@ class EnhancedNutritionAPI:
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
-        self.timeout = 10
-        
-        # Cache for web scraping results
-        self.scraping_cache = {}
+        # (connect, read): fail fast on an unreachable host rather than holding a worker for 10s
+        self.timeout = (1.0, 3.0)
+        self.google_fallback = os.getenv('ENABLE_GOOGLE_FALLBACK', 'False').lower() in ('true', '1')
+        # Pooled keep-alive connections shared across instances
+        self.session = session
     
     def search_nutrition_usda(self, food_name):
         """Search USDA FoodData Central API"""
@@ -36,22 +137,25 @@ class EnhancedNutritionAPI:
             search_url = f"{self.usda_base_url}/foods/search"
             search_params = {
                 'query': food_name,
-                'pageSize': 5,
+                'pageSize': 1,
+                # Search hits for these data types carry their foodNutrients inline
+                'dataType': 'Foundation,SR Legacy,Survey (FNDDS)',
                 'api_key': self.usda_api_key
             }
             
-            response = requests.get(search_url, params=search_params, timeout=self.timeout)
+            response = self.session.get(search_url, params=search_params, timeout=self.timeout)
             
             if response.status_code == 200:
-                data = response.json()
+                data = parse_json(response)
                 
                 if data.get('foods') and len(data['foods']) > 0:
                     # Get the first result
                     food_item = data['foods'][0]
-                    fdc_id = food_item.get('fdcId')
+                    if food_item.get('foodNutrients'):
+                        return self._parse_usda_nutrition_data(food_item)
                     
-                    # Get detailed nutrition data
-                    return self._get_detailed_nutrition_usda(fdc_id)
+                    # Fall back to the detail endpoint for hits without inline nutrients
+                    return self._get_detailed_nutrition_usda(food_item.get('fdcId'))
                 else:
                     return None
             else:
@@ -68,10 +172,10 @@ class EnhancedNutritionAPI:
             detail_url = f"{self.usda_base_url}/food/{fdc_id}"
             params = {'api_key': self.usda_api_key}
             
-            response = requests.get(detail_url, params=params, timeout=self.timeout)
+            response = self.session.get(detail_url, params=params, timeout=self.timeout)
             
             if response.status_code == 200:
-                data = response.json()
+                data = parse_json(response)
                 return self._parse_usda_nutrition_data(data)
             else:
                 return None
@@ -93,25 +197,11 @@ class EnhancedNutritionAPI:
             'source': 'usda'
         }
         
-        if 'foodNutrients' in usda_data:
-            for nutrient in usda_data['foodNutrients']:
-                nutrient_name = nutrient.get('nutrient', {}).get('name', '').lower()
-                value = nutrient.get('amount', 0)
-                
-                if 'energy' in nutrient_name and 'kcal' in nutrient_name:
-                    nutrition['calories'] = value
-                elif 'protein' in nutrient_name:
-                    nutrition['protein'] = value
-                elif 'total lipid' in nutrient_name or 'fat' in nutrient_name:
-                    nutrition['fat'] = value
-                elif 'carbohydrate' in nutrient_name:
-                    nutrition['carbs'] = value
-                elif 'fiber' in nutrient_name:
-                    nutrition['fiber'] = value
-                elif 'sugar' in nutrient_name:
-                    nutrition['sugar'] = value
-                elif 'sodium' in nutrient_name:
-                    nutrition['sodium'] = value
+        found = extract_usda_nutrients(usda_data)
+        # A record reporting none of the macros has nothing to offer; don't pass its zeros off as data
+        if not any(key in found for key in MACRO_KEYS):
+            return None
+        nutrition.update(found)
         
         return nutrition
     
@@ -119,13 +209,18 @@ class EnhancedNutritionAPI:
         """Search OpenFoodFacts for nutrition data"""
         try:
             clean = urllib.parse.quote_plus(food_name)
-            url = f"https://world.openfoodfacts.org/cgi/search.pl?search_terms={clean}&search_simple=1&action=process&json=1&page_size=6"
+            # Only products with completed nutrition facts, so the top hit is usable on its own
+            url = (
+                f"https://world.openfoodfacts.org/cgi/search.pl?search_terms={clean}&search_simple=1"
+                "&action=process&json=1&page_size=1&fields=product_name,nutriments"
+                "&tagtype_0=states&tag_contains_0=contains&tag_0=en:nutrition-facts-completed"
+            )
             
-            response = requests.get(url, headers=self.headers, timeout=self.timeout)
+            response = self.session.get(url, headers=self.headers, timeout=self.timeout)
             if response.status_code != 200:
                 return None
 
-            data = response.json()
+            data = parse_json(response)
             products = data.get('products', [])
             if not products:
                 return None
@@ -186,42 +281,44 @@ class EnhancedNutritionAPI:
             
             google_url = f"https://www.google.com/search?q={encoded_query}"
             
-            response = requests.get(google_url, headers=self.headers, timeout=self.timeout)
+            response = self.session.get(google_url, headers=self.headers, timeout=self.timeout)
             if response.status_code != 200:
                 return None
-                
-            soup = BeautifulSoup(response.content, 'html.parser')
             
             # Look for nutrition information in Google's knowledge panel
+            text = response.text
+            anchor = text.find(NUTRITION_PANEL_ANCHOR)
+            if anchor != -1:
+                text = text[max(0, anchor - NUTRITION_PANEL_BEFORE):anchor + NUTRITION_PANEL_AFTER]
             nutrition_data = {}
             
             # Try to find calories
-            calories_pattern = r'(\d+)\s*(?:calories|kcal|cal)'
-            calories_match = re.search(calories_pattern, response.text, re.IGNORECASE)
+            calories_match = CALORIES_RE.search(text)
             if calories_match:
                 nutrition_data['calories'] = float(calories_match.group(1))
             
             # Try to find protein
-            protein_pattern = r'(\d+(?:\.\d+)?)\s*g?\s*protein'
-            protein_match = re.search(protein_pattern, response.text, re.IGNORECASE)
+            protein_match = PROTEIN_RE.search(text)
             if protein_match:
                 nutrition_data['protein'] = float(protein_match.group(1))
             
             # Try to find carbs
-            carbs_pattern = r'(\d+(?:\.\d+)?)\s*g?\s*(?:carb|carbohydrate)'
-            carbs_match = re.search(carbs_pattern, response.text, re.IGNORECASE)
+            carbs_match = CARBS_RE.search(text)
             if carbs_match:
                 nutrition_data['carbs'] = float(carbs_match.group(1))
             
             # Try to find fat
-            fat_pattern = r'(\d+(?:\.\d+)?)\s*g?\s*(?:fat|lipid)'
-            fat_match = re.search(fat_pattern, response.text, re.IGNORECASE)
+            fat_match = FAT_RE.search(text)
             if fat_match:
                 nutrition_data['fat'] = float(fat_match.group(1))
             
             if len(nutrition_data) >= 2:  # If we found at least 2 nutrients
-                # Fill in missing values with 0
+                # Fill in missing values with 0, macros included, so the result counts as usable
                 nutrition_data.update({
+                    'calories': nutrition_data.get('calories', 0),
+                    'protein': nutrition_data.get('protein', 0),
+                    'carbs': nutrition_data.get('carbs', 0),
+                    'fat': nutrition_data.get('fat', 0),
                     'fiber': nutrition_data.get('fiber', 0),
                     'sugar': nutrition_data.get('sugar', 0),
                     'sodium': nutrition_data.get('sodium', 0),
@@ -238,92 +335,147 @@ class EnhancedNutritionAPI:
         """Get nutrition data from multiple sources with caching"""
         food_name_clean = food_name.lower().strip()
         
+        cache_key = self._cache_key(food_name_clean)
+        
         # Check cache first
-        if food_name_clean in self.scraping_cache:
-            cache_entry = self.scraping_cache[food_name_clean]
-            # Check if cache is fresh (less than 7 days old)
+        try:
+            cached = cache.get(cache_key)
+        except Exception as e:
+            logger.warning(f"Nutrition cache unavailable: {e}")
+            cached = None
+        if cached is not None:
+            logger.info(f"Using cached nutrition data for: {food_name}")
+            return cached
+        
+        nutrition_data = self._search_sources(food_name)
+        if nutrition_data is not None:
+            # Cache the result
             try:
-                cache_time = datetime.fromisoformat(cache_entry['timestamp'])
-                if (datetime.now() - cache_time).days < 7:
-                    logger.info(f"Using cached nutrition data for: {food_name}")
-                    return cache_entry['data']
-            except:
-                pass
+                cache.set(cache_key, nutrition_data, NUTRITION_CACHE_TIMEOUT)
+            except Exception as e:
+                logger.warning(f"Could not cache nutrition data: {e}")
+            
+            return nutrition_data
         
+        return self._get_mock_nutrition_data(food_name)
+    
+    @staticmethod
+    def _cache_key(food_name_clean):
+        return f'nutrition:{food_name_clean}'
+    
+    def _search_sources(self, food_name):
+        """Best result from the live sources, or None when none of them has the food"""
         logger.info(f"Searching comprehensive nutrition data for: {food_name}")
         
-        # Try different sources in order of preference
+        # Query every source at once; each notes when a pool thread actually picks it up
+        started = {}
+        sources = self._sources()
+        futures = [
+            (source_name, _SOURCE_POOL.submit(self._query_source, source_name, source_func, food_name, started))
+            for source_name, source_func in sources
+        ]
+        
+        found_at = None
+        while True:
+            now = time.monotonic()
+            cutoffs = self._source_cutoffs(futures, started, found_at)
+            given_up = {name for name, cutoff in cutoffs.items() if cutoff <= now}
+            source_name, nutrition_data, settled = self._preferred_result(futures, given_up)
+            if settled:
+                break
+            if nutrition_data is not None and found_at is None:
+                found_at = now
+                continue
+            
+            # Sources still queued on the shared pool don't signal when they start, so poll for them
+            wake_ups = [cutoff for cutoff in cutoffs.values() if cutoff > now]
+            if any(not future.done() and name not in started for name, future in futures):
+                wake_ups.append(now + SOURCE_GRACE_PERIOD)
+            wait([future for _, future in futures], timeout=min(wake_ups, default=now) - now, return_when=FIRST_COMPLETED)
+        
+        # Only less preferred sources can still be queued here; ones already running finish in the background
+        for _, future in futures:
+            future.cancel()
+        
+        if nutrition_data is not None:
+            logger.info(f"Found nutrition data from {source_name}")
+        else:
+            logger.warning(f"No nutrition data found for: {food_name}")
+        return nutrition_data
+    
+    def _source_cutoffs(self, futures, started, found_at):
+        """When each running source is given up on; queued ones haven't had their chance yet"""
+        # USDA makes two requests in a row (search, then details), each bounded by self.timeout
+        budget = 2 * sum(self.timeout) + 1
+        cutoffs = {}
+        for source_name, future in futures:
+            start = started.get(source_name)
+            if start is None or future.done():
+                continue
+            cutoffs[source_name] = start + budget
+            if found_at is not None:
+                cutoffs[source_name] = min(cutoffs[source_name], max(start, found_at) + SOURCE_GRACE_PERIOD)
+        return cutoffs
+    
+    def _sources(self):
+        """Nutrition sources in order of preference"""
         sources = [
             ('USDA', self.search_nutrition_usda),
             ('OpenFoodFacts', self.search_nutrition_openfoodfacts),
-            ('Google', self.search_nutrition_google),
         ]
-        
-        for source_name, source_func in sources:
-            try:
-                nutrition_data = source_func(food_name)
-                if nutrition_data and nutrition_data.get('calories', 0) > 0:
-                    logger.info(f"Found nutrition data from {source_name}")
-                    
-                    # Cache the result
-                    self.scraping_cache[food_name_clean] = {
-                        'data': nutrition_data,
-                        'timestamp': datetime.now().isoformat()
-                    }
-                    
-                    return nutrition_data
-            except Exception as e:
-                logger.error(f"{source_name} source failed: {e}")
+        # Scraping Google is slow, fragile and rate-limited, so it's opt-in
+        if self.google_fallback:
+            sources.append(('Google', self.search_nutrition_google))
+        return sources
+    
+    def source_names(self):
+        """Names of the enabled nutrition sources, in order of preference"""
+        return [source_name for source_name, _ in self._sources()]
+    
+    @staticmethod
+    def _query_source(source_name, source_func, food_name, started):
+        """Run one nutrition source, logging failures instead of raising"""
+        started[source_name] = time.monotonic()
+        try:
+            return source_func(food_name)
+        except Exception as e:
+            logger.error(f"{source_name} source failed: {e}")
+            return None
+    
+    @staticmethod
+    def _preferred_result(futures, given_up=()):
+        """Most preferred usable result so far, and whether no better source is still pending"""
+        pending = False
+        for source_name, future in futures:
+            if not future.done():
+                pending = pending or source_name not in given_up
                 continue
-        
-        logger.warning(f"No nutrition data found for: {food_name}")
-        return self._get_mock_nutrition_data(food_name)
+            nutrition_data = None if future.cancelled() else future.result()
+            # All-zero macros are accepted, so genuinely zero-calorie foods (water, black coffee) count
+            if nutrition_data and all(nutrition_data.get(key) is not None for key in MACRO_KEYS):
+                return source_name, nutrition_data, not pending
+        return None, None, not pending
     
     def _get_mock_nutrition_data(self, food_name):
         """Provide mock nutrition data for testing when no data is found"""
-        mock_data = {
-            'pizza': {'calories': 266, 'protein': 11, 'fat': 10, 'carbs': 33, 'fiber': 2.3, 'sugar': 3.6, 'sodium': 598},
-            'hamburger': {'calories': 295, 'protein': 17, 'fat': 14, 'carbs': 28, 'fiber': 2.1, 'sugar': 4.0, 'sodium': 396},
-            'burger': {'calories': 295, 'protein': 17, 'fat': 14, 'carbs': 28, 'fiber': 2.1, 'sugar': 4.0, 'sodium': 396},
-            'sushi': {'calories': 200, 'protein': 9, 'fat': 7, 'carbs': 28, 'fiber': 1.0, 'sugar': 2.0, 'sodium': 400},
-            'chocolate cake': {'calories': 371, 'protein': 4, 'fat': 16, 'carbs': 56, 'fiber': 3.0, 'sugar': 45, 'sodium': 320},
-            'cake': {'calories': 371, 'protein': 4, 'fat': 16, 'carbs': 56, 'fiber': 3.0, 'sugar': 45, 'sodium': 320},
-            'french fries': {'calories': 365, 'protein': 4, 'fat': 17, 'carbs': 48, 'fiber': 4.0, 'sugar': 0.3, 'sodium': 400},
-            'fries': {'calories': 365, 'protein': 4, 'fat': 17, 'carbs': 48, 'fiber': 4.0, 'sugar': 0.3, 'sodium': 400},
-            'chicken': {'calories': 239, 'protein': 27, 'fat': 14, 'carbs': 0, 'fiber': 0, 'sugar': 0, 'sodium': 82},
-            'ice cream': {'calories': 207, 'protein': 4, 'fat': 11, 'carbs': 24, 'fiber': 0.5, 'sugar': 21, 'sodium': 80},
-            'apple': {'calories': 52, 'protein': 0.3, 'fat': 0.2, 'carbs': 14, 'fiber': 2.4, 'sugar': 10.4, 'sodium': 1},
-            'banana': {'calories': 89, 'protein': 1.1, 'fat': 0.3, 'carbs': 23, 'fiber': 2.6, 'sugar': 12.2, 'sodium': 1},
-            'rice': {'calories': 130, 'protein': 2.7, 'fat': 0.3, 'carbs': 28, 'fiber': 0.4, 'sugar': 0.1, 'sodium': 5},
-            'bread': {'calories': 265, 'protein': 9, 'fat': 3.2, 'carbs': 49, 'fiber': 2.7, 'sugar': 5.7, 'sodium': 491},
-            'pasta': {'calories': 131, 'protein': 5, 'fat': 1.1, 'carbs': 25, 'fiber': 1.8, 'sugar': 0.8, 'sodium': 6},
-            'salad': {'calories': 15, 'protein': 1.4, 'fat': 0.1, 'carbs': 3, 'fiber': 1.3, 'sugar': 1.5, 'sodium': 28},
-        }
-        
         # Clean food name for lookup
         clean_name = food_name.lower().replace('_', ' ').strip()
         
-        # Direct match
-        if clean_name in mock_data:
-            data = mock_data[clean_name].copy()
-            data['source'] = 'mock_data'
-            return data
-        
-        # Partial match
-        for key, value in mock_data.items():
-            if key in clean_name or clean_name in key:
-                data = value.copy()
-                data['source'] = 'mock_data'
-                return data
+        # Direct match, then partial match
+        data = MOCK_NUTRITION.get(clean_name)
+        if data is None:
+            data = next(
+                (value for key, value in MOCK_NUTRITION.items() if key in clean_name or clean_name in key),
+                None
+            )
+        if data is not None:
+            return {**data, 'source': 'mock_data'}
         
         # Default fallback
-        return {
-            'calories': 200,
-            'protein': 10,
-            'fat': 8,
-            'carbs': 25,
-            'fiber': 2,
-            'sugar': 5,
-            'sodium': 100,
-            'source': 'default_fallback'
-        }
\ No newline at end of file
+        return DEFAULT_NUTRITION.copy()
+
+
+@lru_cache(maxsize=None)
+def get_nutrition_api():
+    """Return the shared EnhancedNutritionAPI for this process"""
+    return EnhancedNutritionAPI()
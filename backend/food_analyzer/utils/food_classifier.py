@@ -1,63 +1,118 @@
 import os
+import logging
+import threading
+from functools import lru_cache
 import numpy as np
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Loaded Keras / TFLite / ONNX models by path, shared by every FoodClassifier in the process
+_MODELS = {}
+_MODEL_LOCK = threading.Lock()
+
+
+def get_model(model_path):
+    """Load the model at model_path once per process and return the shared instance"""
+    model = _MODELS.get(model_path)
+    if model is None:
+        with _MODEL_LOCK:
+            model = _MODELS.get(model_path)
+            if model is None:
+                if model_path.endswith('.onnx'):
+                    from .onnx_model import ONNXModel
+                    model = ONNXModel(model_path)
+                elif model_path.endswith('.tflite'):
+                    from .tflite import TFLiteModel
+                    model = TFLiteModel(model_path)
+                else:
+                    import tensorflow as tf
+                    model = tf.keras.models.load_model(model_path)
+                _MODELS[model_path] = model
+                logger.info(f"Model loaded successfully from {model_path}")
+    return model
+
+
+# Food-101 sample labels for testing
+FOOD101_LABELS = (
+    'apple_pie', 'baby_back_ribs', 'baklava', 'beef_carpaccio', 'beef_tartare',
+    'beet_salad', 'beignets', 'bibimbap', 'bread_pudding', 'breakfast_burrito',
+    'bruschetta', 'caesar_salad', 'cannoli', 'caprese_salad', 'carrot_cake',
+    'ceviche', 'cheese_plate', 'cheesecake', 'chicken_curry', 'chicken_quesadilla',
+    'chicken_wings', 'chocolate_cake', 'chocolate_mousse', 'churros', 'clam_chowder',
+    'club_sandwich', 'crab_cakes', 'creme_brulee', 'croque_madame', 'cup_cakes',
+    'deviled_eggs', 'donuts', 'dumplings', 'edamame', 'eggs_benedict',
+    'escargots', 'falafel', 'filet_mignon', 'fish_and_chips', 'foie_gras',
+    'french_fries', 'french_onion_soup', 'french_toast', 'fried_calamari', 'fried_rice',
+    'frozen_yogurt', 'garlic_bread', 'gnocchi', 'greek_salad', 'grilled_cheese_sandwich',
+    'grilled_salmon', 'guacamole', 'gyoza', 'hamburger', 'hot_and_sour_soup',
+    'hot_dog', 'huevos_rancheros', 'hummus', 'ice_cream', 'lasagna',
+    'lobster_bisque', 'lobster_roll_sandwich', 'macaroni_and_cheese', 'macarons', 'miso_soup',
+    'mussels', 'nachos', 'omelette', 'onion_rings', 'oysters',
+    'pad_thai', 'paella', 'pancakes', 'panna_cotta', 'peking_duck',
+    'pho', 'pizza', 'pork_chop', 'poutine', 'prime_rib',
+    'pulled_pork_sandwich', 'ramen', 'ravioli', 'red_velvet_cake', 'risotto',
+    'samosa', 'sashimi', 'scallops', 'seaweed_salad', 'shrimp_and_grits',
+    'spaghetti_bolognese', 'spaghetti_carbonara', 'spring_rolls', 'steak', 'strawberry_shortcake',
+    'sushi', 'tacos', 'takoyaki', 'tiramisu', 'tuna_tartare', 'waffles'
+)
+
+
+@lru_cache(maxsize=None)
+def load_labels(labels_path):
+    """Class labels from labels_path (falling back to FOOD101_LABELS), read once per path"""
+    if os.path.exists(labels_path):
+        with open(labels_path, 'r') as f:
+            return tuple(line.strip() for line in f)
+    return FOOD101_LABELS
+
+
 class FoodClassifier:
     def __init__(self):
         self.model_path = os.getenv('MODEL_PATH', 'models/food101_model.h5')
+        # ONNX export for GPU inference (see the export_classifier_onnx command), preferred when present
+        self.onnx_model_path = os.getenv('ONNX_MODEL_PATH', 'models/food101.onnx')
+        # INT8 export of the model (see the export_classifier_tflite command)
+        self.tflite_model_path = os.getenv('TFLITE_MODEL_PATH', 'models/food101_int8.tflite')
         self.labels_path = os.getenv('LABELS_PATH', 'models/food101_labels.txt')
         self.model = None
         self.labels = self._load_labels()
         self._load_model()
+        # What ImageProcessor.preprocess_image should produce for this model
+        self.input_dtype = getattr(self.model, 'input_dtype', np.float32)
+        self.input_quantization = getattr(self.model, 'input_quantization', None)
     
     def _load_model(self):
         """Load TensorFlow model or use mock classifier"""
+        if os.path.exists(self.onnx_model_path):
+            try:
+                self.model = get_model(self.onnx_model_path)
+                return
+            except ImportError:
+                logger.warning("onnxruntime not available, trying the other model formats")
+            except Exception as e:
+                logger.error(f"Error loading ONNX model: {e}, trying the other model formats")
+        
         try:
-            import tensorflow as tf
-            if os.path.exists(self.model_path):
-                self.model = tf.keras.models.load_model(self.model_path)
-                print(f"Model loaded successfully from {self.model_path}")
+            if os.path.exists(self.tflite_model_path):
+                self.model = get_model(self.tflite_model_path)
+            elif os.path.exists(self.model_path):
+                self.model = get_model(self.model_path)
             else:
-                print(f"Model file not found at {self.model_path}, using mock classifier")
+                logger.warning(f"Model file not found at {self.model_path}, using mock classifier")
                 self.model = None
         except ImportError:
-            print("TensorFlow not available, using mock classifier")
+            logger.warning("TensorFlow not available, using mock classifier")
             self.model = None
         except Exception as e:
-            print(f"Error loading model: {e}, using mock classifier")
+            logger.error(f"Error loading model: {e}, using mock classifier")
             self.model = None
     
     def _load_labels(self):
         """Load class labels"""
-        if os.path.exists(self.labels_path):
-            with open(self.labels_path, 'r') as f:
-                return [line.strip() for line in f.readlines()]
-        else:
-            # Food-101 sample labels for testing
-            return [
-                'apple_pie', 'baby_back_ribs', 'baklava', 'beef_carpaccio', 'beef_tartare',
-                'beet_salad', 'beignets', 'bibimbap', 'bread_pudding', 'breakfast_burrito',
-                'bruschetta', 'caesar_salad', 'cannoli', 'caprese_salad', 'carrot_cake',
-                'ceviche', 'cheese_plate', 'cheesecake', 'chicken_curry', 'chicken_quesadilla',
-                'chicken_wings', 'chocolate_cake', 'chocolate_mousse', 'churros', 'clam_chowder',
-                'club_sandwich', 'crab_cakes', 'creme_brulee', 'croque_madame', 'cup_cakes',
-                'deviled_eggs', 'donuts', 'dumplings', 'edamame', 'eggs_benedict',
-                'escargots', 'falafel', 'filet_mignon', 'fish_and_chips', 'foie_gras',
-                'french_fries', 'french_onion_soup', 'french_toast', 'fried_calamari', 'fried_rice',
-                'frozen_yogurt', 'garlic_bread', 'gnocchi', 'greek_salad', 'grilled_cheese_sandwich',
-                'grilled_salmon', 'guacamole', 'gyoza', 'hamburger', 'hot_and_sour_soup',
-                'hot_dog', 'huevos_rancheros', 'hummus', 'ice_cream', 'lasagna',
-                'lobster_bisque', 'lobster_roll_sandwich', 'macaroni_and_cheese', 'macarons', 'miso_soup',
-                'mussels', 'nachos', 'omelette', 'onion_rings', 'oysters',
-                'pad_thai', 'paella', 'pancakes', 'panna_cotta', 'peking_duck',
-                'pho', 'pizza', 'pork_chop', 'poutine', 'prime_rib',
-                'pulled_pork_sandwich', 'ramen', 'ravioli', 'red_velvet_cake', 'risotto',
-                'samosa', 'sashimi', 'scallops', 'seaweed_salad', 'shrimp_and_grits',
-                'spaghetti_bolognese', 'spaghetti_carbonara', 'spring_rolls', 'steak', 'strawberry_shortcake',
-                'sushi', 'tacos', 'takoyaki', 'tiramisu', 'tuna_tartare', 'waffles'
-            ]
+        return load_labels(self.labels_path)
     
     def predict(self, preprocessed_image):
         """
@@ -67,22 +122,32 @@ class FoodClassifier:
         if self.model is not None:
             try:
                 # Real model prediction
-                predictions = self.model.predict(preprocessed_image, verbose=0)
-                predicted_class_idx = np.argmax(predictions[0])
-                confidence = float(predictions[0][predicted_class_idx])
-                
-                if predicted_class_idx < len(self.labels):
-                    predicted_class = self.labels[predicted_class_idx]
-                else:
-                    predicted_class = "unknown_food"
-                
-                return predicted_class, confidence * 100
+                return self.predict_batch(preprocessed_image)[0]
             except Exception as e:
-                print(f"Prediction error: {e}, falling back to mock")
+                logger.error(f"Prediction error: {e}, falling back to mock")
                 return self._mock_prediction()
         else:
             return self._mock_prediction()
     
+    def predict_batch(self, preprocessed_images):
+        """
+        Predict food classes for a stacked batch of preprocessed images in one forward pass
+        Returns: [(predicted_class, confidence_score), ...]
+        """
+        # Calling the model directly skips predict()'s dataset and callback machinery
+        predictions = np.asarray(self.model(preprocessed_images, training=False))
+        class_indices = np.argmax(predictions, axis=1)
+        confidences = predictions[np.arange(len(predictions)), class_indices]
+        
+        results = []
+        for predicted_class_idx, confidence in zip(class_indices.tolist(), confidences.tolist()):
+            if predicted_class_idx < len(self.labels):
+                predicted_class = self.labels[predicted_class_idx]
+            else:
+                predicted_class = "unknown_food"
+            results.append((predicted_class, confidence * 100))
+        return results
+    
     def _mock_prediction(self):
         """Mock prediction for testing when model is not available"""
         mock_foods = [
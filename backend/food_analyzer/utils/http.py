@@ -0,0 +1,33 @@
+import json
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def build_session(pool_connections=16, pool_maxsize=32, retries=2):
+    """requests.Session with a keep-alive connection pool and retries on connection errors"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=Retry(total=retries, backoff_factor=0.2),
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+# Shared by the detector and nutrition clients so they reuse one pool per process
+session = build_session()
+
+
+def parse_json(response):
+    """Decode a JSON response body, with orjson straight from the raw bytes when installed"""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return json.loads(response.content)
@@ -2,56 +2,160 @@ import cv2
 import numpy as np
 from PIL import Image
 import io
+import threading
+
+try:
+    # Registers HEIC/HEIF (iPhone camera default) with PIL when installed
+    from pillow_heif import register_heif_opener
+    register_heif_opener()
+except ImportError:
+    pass
+
+# Multiplying by the reciprocal avoids a per-pixel division when normalising
+INV_255 = np.float32(1.0 / 255.0)
+
+# CLAHE objects keep per-call tile state, so each thread builds one and reuses it
+_clahe = threading.local()
+
+
+def _get_clahe():
+    clahe = getattr(_clahe, 'instance', None)
+    if clahe is None:
+        clahe = _clahe.instance = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
+    return clahe
+
+
+# Leading bytes of the common formats; WebP has its tag after the RIFF size field
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+    (b'BM', 'bmp'),
+    (b'II*\x00', 'tiff'),
+    (b'MM\x00*', 'tiff'),
+)
+
+# ISO-BMFF brands (after the 'ftyp' box tag) of HEIF/HEIC and AVIF photos
+FTYP_BRANDS = {
+    b'heic': 'heif', b'heix': 'heif', b'heim': 'heif', b'heis': 'heif',
+    b'hevc': 'heif', b'hevx': 'heif', b'mif1': 'heif', b'msf1': 'heif',
+    b'avif': 'avif', b'avis': 'avif',
+}
+
+# What the PIL fallback may report; it also identifies EPS, PPM, TGA and the like from a header
+PIL_IMAGE_FORMATS = frozenset({'jpeg', 'png', 'webp', 'gif', 'bmp', 'tiff', 'heif', 'avif'})
+
+
+class InvalidImageError(Exception):
+    """The upload could not be decoded as an image"""
+
+
+def image_format_from_header(header):
+    """Image format from the first bytes of a file, or None"""
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    if header[4:8] == b'ftyp' and header[8:12] in FTYP_BRANDS:
+        return FTYP_BRANDS[header[8:12]]
+    for signature, image_format in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return image_format
+    # Variants of the allowed formats PIL (and its installed plugins) can identify from the header alone
+    try:
+        with Image.open(io.BytesIO(header)) as img:
+            image_format = img.format.lower()
+    except Exception:
+        return None
+    return image_format if image_format in PIL_IMAGE_FORMATS else None
+
+
+def perceptual_hash(rgb, hash_size=16):
+    """Difference hash of an RGB array as hex; near-duplicate images (re-encodes, resizes) share it"""
+    gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    return np.packbits(small[:, 1:] > small[:, :-1]).tobytes().hex()
+
+
+# libjpeg can scale by these factors during decode, skipping most of the IDCT work
+REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+def _decode_flags(image_bytes, target_size):
+    """imdecode flags decoding a JPEG at the smallest scale still covering target_size"""
+    if not image_bytes.startswith(b'\xff\xd8\xff'):
+        return cv2.IMREAD_COLOR
+    try:
+        # Only the header is parsed here
+        width, height = Image.open(io.BytesIO(image_bytes)).size
+    except Exception:
+        return cv2.IMREAD_COLOR
+    for factor, flag in REDUCED_DECODE_FLAGS:
+        if width // factor >= target_size[0] and height // factor >= target_size[1]:
+            return flag
+    return cv2.IMREAD_COLOR
+
 
 class ImageProcessor:
     @staticmethod
-    def preprocess_image(image_file, target_size=(224, 224)):
+    def preprocess_image(image_file, target_size=(224, 224), dtype=np.float32, quantization=None):
         """
         Preprocess uploaded image for model prediction
+        dtype / quantization match the model input, e.g. float16 or int8 with (scale, zero_point)
         """
         try:
             # Read image from uploaded file
             image_bytes = image_file.read()
             image_file.seek(0)  # Reset file pointer
             
-            # Convert to PIL Image
-            pil_image = Image.open(io.BytesIO(image_bytes))
-            
-            # Convert to RGB if necessary
-            if pil_image.mode != 'RGB':
-                pil_image = pil_image.convert('RGB')
-            
-            # Convert PIL to OpenCV format
-            opencv_image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
+            # Decode straight to a BGR array; orientation is left as stored, as PIL does
+            opencv_image = cv2.imdecode(
+                np.frombuffer(image_bytes, dtype=np.uint8),
+                _decode_flags(image_bytes, target_size) | cv2.IMREAD_IGNORE_ORIENTATION
+            )
+            if opencv_image is None:
+                # Formats OpenCV can't decode still go through PIL
+                pil_image = Image.open(io.BytesIO(image_bytes)).convert('RGB')
+                opencv_image = cv2.cvtColor(np.asarray(pil_image), cv2.COLOR_RGB2BGR)
             
             # Resize image
             resized = cv2.resize(opencv_image, target_size)
             
-            # Normalize pixel values to [0, 1]
-            normalized = resized.astype(np.float32) / 255.0
-            
-            # Add batch dimension
-            processed = np.expand_dims(normalized, axis=0)
+            if quantization:
+                # Quantize straight from the uint8 pixels instead of handing over float32
+                scale, zero_point = quantization
+                info = np.iinfo(dtype)
+                processed = resized * np.float32(INV_255 / scale) + np.float32(zero_point)
+                np.rint(processed, out=processed)
+                np.clip(processed, info.min, info.max, out=processed)
+                return processed.astype(dtype)[np.newaxis, ...]
             
-            return processed
+            # Normalize pixel values to [0, 1] and add batch dimension
+            processed = resized.astype(dtype)
+            processed *= np.dtype(dtype).type(INV_255)
+            return processed[np.newaxis, ...]
             
         except Exception as e:
-            raise Exception(f"Image preprocessing failed: {str(e)}")
+            raise InvalidImageError(f"Image preprocessing failed: {str(e)}")
     
     @staticmethod
     def enhance_image(image_array):
         """
         Apply image enhancement techniques
         """
-        # Convert back to uint8 for OpenCV operations
-        img_uint8 = (image_array[0] * 255).astype(np.uint8)
+        # Convert back to uint8 for OpenCV operations (scale, round and saturate in one pass)
+        img_uint8 = cv2.convertScaleAbs(image_array[0], alpha=255.0)
         
-        # Apply CLAHE (Contrast Limited Adaptive Histogram Equalization)
-        lab = cv2.cvtColor(img_uint8, cv2.COLOR_BGR2LAB)
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-        lab[:,:,0] = clahe.apply(lab[:,:,0])
-        enhanced = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
+        # Apply CLAHE (Contrast Limited Adaptive Histogram Equalization) to luma only;
+        # YCrCb's linear transform is much cheaper than a LAB round trip
+        ycrcb = cv2.cvtColor(img_uint8, cv2.COLOR_BGR2YCrCb)
+        ycrcb[:,:,0] = _get_clahe().apply(ycrcb[:,:,0])
+        enhanced = cv2.cvtColor(ycrcb, cv2.COLOR_YCrCb2BGR)
         
         # Normalize back to [0, 1] and add batch dimension
-        normalized = enhanced.astype(np.float32) / 255.0
+        normalized = enhanced.astype(np.float32)
+        normalized *= INV_255
         return np.expand_dims(normalized, axis=0)
\ No newline at end of file
@@ -1,13 +1,20 @@
-import requests
-import os
-from dotenv import load_dotenv
+import logging
+from django.core.cache import cache
+from .enhanced_nutrition_api import EnhancedNutritionAPI, NUTRITION_CACHE_TIMEOUT
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
-class NutritionAPI:
-    def __init__(self):
-        self.usda_api_key = os.getenv('USDA_API_KEY')
-        self.usda_base_url = 'https://api.nal.usda.gov/fdc/v1'
+# EnhancedNutritionAPI keys -> this API's field names
+LEGACY_KEYS = {
+    'calories': 'calories_kcal',
+    'protein': 'protein_g',
+    'fat': 'fat_g',
+    'carbs': 'carbs_g',
+}
+
+
+class NutritionAPI(EnhancedNutritionAPI):
+    """USDA-only lookup returning the legacy calories_kcal / protein_g / ... fields"""
     
     def search_nutrition(self, food_name):
         """
@@ -16,57 +23,29 @@ class NutritionAPI:
         if not self.usda_api_key:
             return self._mock_nutrition_data(food_name)
         
+        # Classifier labels repeat constantly, so serve them from the shared cache
+        cache_key = f'nutrition:usda:{food_name.lower().strip()}'
         try:
-            # Search for food item
-            search_url = f"{self.usda_base_url}/foods/search"
-            search_params = {
-                'query': food_name,
-                'pageSize': 5,
-                'api_key': self.usda_api_key
-            }
-            
-            response = requests.get(search_url, params=search_params, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                if data.get('foods') and len(data['foods']) > 0:
-                    # Get the first result
-                    food_item = data['foods'][0]
-                    fdc_id = food_item.get('fdcId')
-                    
-                    # Get detailed nutrition data
-                    return self._get_detailed_nutrition(fdc_id)
-                else:
-                    return self._mock_nutrition_data(food_name)
-            else:
-                print(f"USDA API error: {response.status_code}")
-                return self._mock_nutrition_data(food_name)
-                
+            cached = cache.get(cache_key)
         except Exception as e:
-            print(f"Nutrition API error: {e}")
+            logger.warning(f"Nutrition cache unavailable: {e}")
+            cached = None
+        if cached is not None:
+            return cached
+        
+        nutrition = self.search_nutrition_usda(food_name)
+        if nutrition is None:
             return self._mock_nutrition_data(food_name)
-    
-    def _get_detailed_nutrition(self, fdc_id):
-        """Get detailed nutrition data for a specific food item"""
+        nutrition = self._to_legacy(nutrition)
         try:
-            detail_url = f"{self.usda_base_url}/food/{fdc_id}"
-            params = {'api_key': self.usda_api_key}
-            
-            response = requests.get(detail_url, params=params, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return self._parse_nutrition_data(data)
-            else:
-                return None
-                
+            cache.set(cache_key, nutrition, NUTRITION_CACHE_TIMEOUT)
         except Exception as e:
-            print(f"Detailed nutrition API error: {e}")
-            return None
+            logger.warning(f"Could not cache nutrition data: {e}")
+        return nutrition
     
-    def _parse_nutrition_data(self, usda_data):
-        """Parse USDA nutrition data into our format"""
+    @staticmethod
+    def _to_legacy(nutrients):
+        """Map EnhancedNutritionAPI nutrition onto the legacy fields"""
         nutrition = {
             'calories_kcal': 0,
             'protein_g': 0,
@@ -74,21 +53,9 @@ class NutritionAPI:
             'carbs_g': 0,
             'serving_size': '100g'
         }
-        
-        if 'foodNutrients' in usda_data:
-            for nutrient in usda_data['foodNutrients']:
-                nutrient_name = nutrient.get('nutrient', {}).get('name', '').lower()
-                value = nutrient.get('amount', 0)
-                
-                if 'energy' in nutrient_name and 'kcal' in nutrient_name:
-                    nutrition['calories_kcal'] = value
-                elif 'protein' in nutrient_name:
-                    nutrition['protein_g'] = value
-                elif 'total lipid' in nutrient_name or 'fat' in nutrient_name:
-                    nutrition['fat_g'] = value
-                elif 'carbohydrate' in nutrient_name:
-                    nutrition['carbs_g'] = value
-        
+        for key, legacy_key in LEGACY_KEYS.items():
+            if nutrients.get(key):
+                nutrition[legacy_key] = nutrients[key]
         return nutrition
     
     def _mock_nutrition_data(self, food_name):
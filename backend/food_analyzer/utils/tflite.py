@@ -0,0 +1,62 @@
+import os
+import threading
+import numpy as np
+import tensorflow as tf
+
+
+def export_int8_tflite(model, output_path, representative_batches):
+    """Convert a Keras model to a fully INT8-quantized TFLite model"""
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = lambda: ([batch] for batch in representative_batches)
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.int8
+    converter.inference_output_type = tf.int8
+    
+    with open(output_path, 'wb') as f:
+        f.write(converter.convert())
+
+
+class TFLiteModel:
+    """INT8 TFLite interpreter standing in for a Keras model at inference time"""
+    
+    def __init__(self, model_path):
+        self.interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=os.cpu_count())
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = int(self._input['shape'][0])
+        self.input_shape = (None, *(int(dim) for dim in self._input['shape'][1:]))
+        # Lets callers hand over already-quantized input (see ImageProcessor.preprocess_image)
+        self.input_dtype = self._input['dtype']
+        self.input_quantization = self._input['quantization'] if self._input['quantization'][0] else None
+        # An interpreter holds its tensors in place, so calls can't overlap
+        self._lock = threading.Lock()
+    
+    def __call__(self, batch, training=False):
+        batch = np.asarray(batch)
+        # Input already in the model's dtype was quantized by the caller
+        if batch.dtype != self.input_dtype:
+            batch = batch.astype(np.float32)
+            scale, zero_point = self._input['quantization']
+            if scale:
+                dtype = self._input['dtype']
+                batch = np.clip(np.round(batch / scale + zero_point), np.iinfo(dtype).min, np.iinfo(dtype).max)
+                batch = batch.astype(dtype)
+        
+        with self._lock:
+            if batch.shape[0] != self._batch_size:
+                self.interpreter.resize_tensor_input(self._input['index'], batch.shape)
+                self.interpreter.allocate_tensors()
+                self._batch_size = batch.shape[0]
+            self.interpreter.set_tensor(self._input['index'], batch)
+            self.interpreter.invoke()
+            output = self.interpreter.get_tensor(self._output['index'])
+        
+        scale, zero_point = self._output['quantization']
+        if scale:
+            output = (output.astype(np.float32) - zero_point) * scale
+        return output
+    
+    def predict(self, batch, verbose=0):
+        return self(batch)
@@ -1,176 +1,254 @@
 import os
-import io
 import time
+import uuid
 import logging
-from PIL import Image as PILImage
+import threading
+from collections import Counter
+from datetime import timezone as dt_timezone
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import MultiPartParser
+from django.conf import settings
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 from django.utils import timezone
-from django.db.models import F, Q
-from .models import FoodAnalysis, UserFeedback, SystemStatistics, FoodDatabase, LearningCache
+from django.utils.dateparse import parse_datetime
+from django.db import close_old_connections, transaction
+from django.db.models import Case, ExpressionWrapper, F, FloatField, Prefetch, Q, Value, When
+from django.db.models.lookups import GreaterThan
+from .models import FoodAnalysis, UserFeedback, SystemStatistics, FoodDatabase
 from .serializers import (
     FoodAnalysisSerializer, UserFeedbackSerializer, SystemStatisticsSerializer,
-    FoodDatabaseSerializer, DetailedAnalysisSerializer
+    FoodDatabaseSerializer, DetailedAnalysisSerializer, FOOD_ANALYSIS_COLUMNS
 )
-from .utils.enhanced_food_detector import EnhancedFoodDetector
-from .utils.enhanced_nutrition_api import EnhancedNutritionAPI
-from .utils.image_processor import ImageProcessor
+from .learning import lookup_correction
+from .utils.enhanced_food_detector import get_detector
+from .utils.enhanced_nutrition_api import get_nutrition_api
+from .exceptions import ClassificationError, InvalidUploadError
+from .upload_handlers import ImageUploadHandler
+from .utils.image_processor import ImageProcessor, InvalidImageError
 
 logger = logging.getLogger(__name__)
 
+# Served when the nutrition lookup fails or is skipped; read-only as it's shared by every request
+FALLBACK_NUTRITION = MappingProxyType({
+    'calories': 200,
+    'protein': 10,
+    'fat': 8,
+    'carbs': 25,
+    'fiber': 2,
+    'sugar': 5,
+    'sodium': 100,
+    'source': 'fallback'
+})
+
+# Statistics bookkeeping runs off the request path; one worker keeps the counter updates serialised
+_STATS_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix='analysis-stats')
+
+
+# Detected-food search counts, buffered and written to FoodDatabase in one UPDATE per interval;
+# a crash loses at most one interval of this popularity counter
+FOOD_SEARCH_FLUSH_INTERVAL = 5  # seconds
+_food_searches = Counter()
+_food_search_lock = threading.Lock()
+_food_search_timer = None
+
+
+def _record_food_search(food_name):
+    """Count a search for food_name, scheduling a flush if none is pending"""
+    global _food_search_timer
+    with _food_search_lock:
+        _food_searches[food_name] += 1
+        if _food_search_timer is None:
+            _food_search_timer = threading.Timer(
+                FOOD_SEARCH_FLUSH_INTERVAL, _STATS_POOL.submit, args=(_flush_food_searches,)
+            )
+            _food_search_timer.daemon = True
+            _food_search_timer.start()
+
+
+def _flush_food_searches():
+    """Write the buffered search counts with a single UPDATE, creating entries for new foods"""
+    global _food_search_timer
+    with _food_search_lock:
+        counts = dict(_food_searches)
+        _food_searches.clear()
+        _food_search_timer = None
+    if not counts:
+        return
+    
+    close_old_connections()
+    try:
+        now = timezone.now()
+        entries = FoodDatabase.objects.filter(food_name__in=counts)
+        increment = Case(
+            *(When(food_name=name, then=Value(count)) for name, count in counts.items()),
+            default=Value(0)
+        )
+        if entries.update(search_count=F('search_count') + increment, last_searched=now, updated_at=now) < len(counts):
+            # Foods seen for the first time; conflicts mean another worker just created them
+            missing = counts.keys() - set(entries.values_list('food_name', flat=True))
+            FoodDatabase.objects.bulk_create([
+                FoodDatabase(food_name=name, search_count=0, data_source='detection', category='detected')
+                for name in missing
+            ], ignore_conflicts=True)
+            FoodDatabase.objects.filter(food_name__in=missing).update(
+                search_count=F('search_count') + increment, last_searched=now, updated_at=now
+            )
+    except Exception as e:
+        logger.error(f"Error updating food database stats: {e}")
+
+
+def _percentage(part, total):
+    """part / total * 100 as a float SQL expression, 0 while total is zero (like SystemStatistics._rate)"""
+    return Case(
+        When(GreaterThan(total, 0), then=ExpressionWrapper(part * 100.0 / total, output_field=FloatField())),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
 
 class AnalyzeFoodView(APIView):
-    parser_classes = (MultiPartParser, FormParser)
+    parser_classes = (MultiPartParser,)
+    
+    # DRF builds a view instance per request, so share the heavy helpers across them
+    image_processor = ImageProcessor()
+    nutrition_api = get_nutrition_api()
     
-    def __init__(self):
-        super().__init__()
-        self.image_processor = ImageProcessor()
-        self.food_detector = EnhancedFoodDetector()
-        self.nutrition_api = EnhancedNutritionAPI()
+    @property
+    def food_detector(self):
+        # Loaded on first use so importing the views doesn't pull in the backbones
+        return get_detector()
+    
+    def initialize_request(self, request, *args, **kwargs):
+        # Size and image-type checks run as this endpoint's upload streams in, ahead of the default
+        # handlers; installed before DRF wraps the request, so nothing has parsed the body yet
+        request.upload_handlers.insert(0, ImageUploadHandler(request))
+        return super().initialize_request(request, *args, **kwargs)
     
     def post(self, request):
-        start_time = time.time()
+        # Read by exceptions.handler to report how long a failed analysis ran
+        self.start_time = start_time = time.time()
+        
+        files = request.FILES
+        
+        # Size and image signature were checked by ImageUploadHandler as the upload streamed in;
+        # the detector's decode rejects corrupt bodies. Errors are rendered by exceptions.handler.
+        rejection = getattr(request, 'upload_rejection', None)
+        if rejection:
+            raise InvalidUploadError(rejection)
+        if 'image' not in files:
+            raise InvalidUploadError('No image file provided')
+        image_file = files['image']
         
+        # Enhanced food detection
+        food_name, confidence = self._detect(image_file)
+        
+        # Apply learning corrections if available
         try:
-            # Check if image is in the request
-            if 'image' not in request.FILES:
-                return Response(
-                    {'error': 'No image file provided'}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            image_file = request.FILES['image']
-            
-            # Validate image file
-            content_type = getattr(image_file, 'content_type', '') or ''
-            if not content_type.startswith('image/'):
-                try:
-                    # Read bytes and attempt to open/verify as an image
-                    image_bytes = image_file.read()
-                    image_file.seek(0)
-                    PILImage.open(io.BytesIO(image_bytes)).verify()
-                except Exception:
-                    return Response(
-                        {'error': 'File must be an image'}, 
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-            
-            # Enhanced food detection
-            try:
-                food_name, confidence = self.food_detector.detect_food(image_file)
-                logger.info(f"Detected: {food_name} with confidence: {confidence:.2f}%")
-            except Exception as e:
-                logger.error(f"Food detection failed: {e}")
-                return Response(
-                    {'error': f'Food classification failed: {str(e)}'}, 
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
-            
-            # Apply learning corrections if available
-            try:
-                corrected_food, confidence = self._apply_learning_corrections(food_name, confidence)
-                if corrected_food != food_name:
-                    logger.info(f"Applied learning correction: {food_name} → {corrected_food}")
-                    food_name = corrected_food
-            except Exception as e:
-                logger.error(f"Learning correction failed: {e}")
-                # Continue with original detection
-            
-            # Get enhanced nutrition data
-            try:
-                nutrition_data = self.nutrition_api.get_comprehensive_nutrition(food_name)
-                logger.info(f"Retrieved nutrition data from: {nutrition_data.get('source', 'unknown')}")
-            except Exception as e:
-                logger.error(f"Nutrition lookup error: {e}")
-                # Provide fallback nutrition data
+            corrected_food, confidence = self._apply_learning_corrections(food_name, confidence)
+            if corrected_food != food_name:
+                logger.info(f"Applied learning correction: {food_name} → {corrected_food}")
+                food_name = corrected_food
+        except Exception as e:
+            logger.error(f"Learning correction failed: {e}")
+            # Continue with original detection
+        
+        # Get enhanced nutrition data; a low-confidence guess isn't worth an external lookup
+        min_confidence = settings.FOOD_DETECTION_SETTINGS['MIN_NUTRITION_CONFIDENCE']
+        low_confidence = confidence < min_confidence
+        try:
+            if low_confidence:
+                logger.info(f"Skipping nutrition lookup for low-confidence detection ({confidence:.1f}%)")
                 nutrition_data = self._get_fallback_nutrition()
-            
-            # Calculate processing time
-            processing_time = time.time() - start_time
-            
-            # Save analysis to database
-            try:
-                food_analysis = FoodAnalysis.objects.create(
-                    image=image_file,
-                    food_name=food_name,
-                    confidence=confidence,
-                    calories_kcal=nutrition_data.get('calories', 0),
-                    protein_g=nutrition_data.get('protein', 0),
-                    fat_g=nutrition_data.get('fat', 0),
-                    carbs_g=nutrition_data.get('carbs', 0),
-                    fiber_g=nutrition_data.get('fiber', 0),
-                    sugar_g=nutrition_data.get('sugar', 0),
-                    sodium_mg=nutrition_data.get('sodium', 0),
-                    serving_size="100g",
-                    model_used="enhanced_multi_model",
-                    processing_time=processing_time,
-                    data_source=nutrition_data.get('source', 'unknown')
-                )
-                
-                # Update system statistics
-                self._update_system_statistics(confidence, processing_time, nutrition_data.get('source'))
-                
-                # Update food database search count
-                self._update_food_database_stats(food_name)
-                
-            except Exception as e:
-                logger.error(f"Database save error: {e}")
-                # Continue with response even if DB save fails
-                food_analysis = None
-            
-            # Serialize and return response
-            if food_analysis:
-                serializer = FoodAnalysisSerializer(food_analysis, context={'request': request})
-                response_data = serializer.data
             else:
-                # Manual response if DB save failed
-                response_data = self._create_manual_response(food_name, confidence, nutrition_data, processing_time)
-            
-            # Add enhanced analysis information
-            response_data['enhanced_analysis'] = {
-                'model_ensemble': True,
-                'models_used': list(self.food_detector.models.keys()),
-                'image_variations_processed': len(self.food_detector.models) * 4,
-                'confidence_level': self._get_confidence_level(confidence),
-                'processing_time': round(processing_time, 2),
-                'nutrition_source': nutrition_data.get('source', 'unknown'),
-                'learning_applied': corrected_food != food_name if 'corrected_food' in locals() else False
-            }
-            
-            return Response(response_data, status=status.HTTP_200_OK)
-            
+                nutrition_data = self.nutrition_api.get_comprehensive_nutrition(food_name)
+            logger.info(f"Retrieved nutrition data from: {nutrition_data.get('source', 'unknown')}")
         except Exception as e:
-            processing_time = time.time() - start_time
-            logger.error(f"Analysis exception: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.error(f"Nutrition lookup error: {e}")
+            # Provide fallback nutrition data
+            nutrition_data = self._get_fallback_nutrition()
+        
+        # Calculate processing time
+        processing_time = time.time() - start_time
+        
+        # Save analysis to database
+        try:
+            food_analysis = FoodAnalysis.objects.create(
+                image=image_file,
+                food_name=food_name,
+                confidence=confidence,
+                calories_kcal=nutrition_data.get('calories', 0),
+                protein_g=nutrition_data.get('protein', 0),
+                fat_g=nutrition_data.get('fat', 0),
+                carbs_g=nutrition_data.get('carbs', 0),
+                fiber_g=nutrition_data.get('fiber', 0),
+                sugar_g=nutrition_data.get('sugar', 0),
+                sodium_mg=nutrition_data.get('sodium', 0),
+                serving_size="100g",
+                model_used="enhanced_multi_model",
+                processing_time=processing_time,
+                data_source=nutrition_data.get('source', 'unknown')
+            )
             
-            return Response(
-                {
-                    'error': f'Analysis failed: {str(e)}',
-                    'processing_time': round(processing_time, 2)
-                }, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            # Statistics don't affect the response, so update them in the background
+            _STATS_POOL.submit(
+                self._record_statistics, confidence, processing_time,
+                nutrition_data.get('source'), food_name
             )
+            
+        except Exception as e:
+            logger.error(f"Database save error: {e}")
+            # Continue with response even if DB save fails
+            food_analysis = None
+        
+        # Serialize and return response
+        if food_analysis:
+            serializer = FoodAnalysisSerializer(food_analysis, context={'request': request})
+            response_data = serializer.data
+        else:
+            # Manual response if DB save failed
+            response_data = self._create_manual_response(food_name, confidence, nutrition_data, processing_time)
+        
+        # Add enhanced analysis information
+        response_data['enhanced_analysis'] = {
+            'model_ensemble': True,
+            'models_used': list(self.food_detector.models.keys()),
+            'image_variations_processed': len(self.food_detector.models) * 4,
+            'confidence_level': self._get_confidence_level(confidence),
+            'processing_time': round(processing_time, 2),
+            'nutrition_source': nutrition_data.get('source', 'unknown'),
+            'low_confidence': low_confidence,
+            'learning_applied': corrected_food != food_name if 'corrected_food' in locals() else False
+        }
+        
+        return Response(response_data, status=status.HTTP_200_OK)
+    
+    def _detect(self, image_file):
+        """Run the detector, reporting anything but an undecodable image as a ClassificationError"""
+        try:
+            food_name, confidence = self.food_detector.detect_food(image_file)
+            logger.info(f"Detected: {food_name} with confidence: {confidence:.2f}%")
+            return food_name, confidence
+        except InvalidImageError:
+            raise
+        except Exception as e:
+            raise ClassificationError(str(e)) from e
     
     def _apply_learning_corrections(self, food_name, confidence):
         """Apply learning corrections based on user feedback"""
         try:
-            # Look for learned corrections
-            cache_entries = LearningCache.objects.filter(
-                predicted_food=food_name.lower().strip()
-            ).order_by('-occurrence_count', '-last_seen')
+            # Look for learned corrections; the table changes only on feedback, so they're memoised
+            best_correction = lookup_correction(food_name.lower().strip())
             
-            if cache_entries.exists():
-                best_correction = cache_entries.first()
-                
+            if best_correction:
                 # Apply correction with confidence boost
-                corrected_name = best_correction.correct_food.title()
-                boosted_confidence = min(confidence * best_correction.confidence_boost, 95.0)
+                correct_food, confidence_boost = best_correction
+                corrected_name = correct_food.title()
+                boosted_confidence = min(confidence * confidence_boost, 95.0)
                 
                 logger.info(f"Applied learning: {food_name} → {corrected_name} "
                            f"(confidence: {confidence:.1f}% → {boosted_confidence:.1f}%)")
@@ -182,83 +260,68 @@ class AnalyzeFoodView(APIView):
         
         return food_name, confidence
     
+    def _record_statistics(self, confidence, processing_time, data_source, food_name):
+        """Background bookkeeping for one saved analysis"""
+        # Long-lived worker threads don't see request_finished, so drop stale connections here
+        close_old_connections()
+        self._update_system_statistics(confidence, processing_time, data_source)
+        self._update_food_database_stats(food_name)
+    
     def _update_system_statistics(self, confidence, processing_time, data_source):
         """Update system performance statistics"""
         try:
-            stats, created = SystemStatistics.objects.get_or_create(
-                date=timezone.now().date(),
-                defaults={
-                    'total_predictions': 0,
-                    'correct_predictions': 0,
-                    'average_processing_time': 0.0,
-                }
-            )
-            
-            # Update prediction counts
-            stats.total_predictions += 1
-            
-            # Update confidence-based metrics
-            if confidence >= 80:
-                stats.high_confidence_predictions += 1
-            elif confidence >= 60:
-                stats.medium_confidence_predictions += 1
-            else:
-                stats.low_confidence_predictions += 1
-            
-            # Update processing time (moving average)
-            if stats.total_predictions == 1:
-                stats.average_processing_time = processing_time
-            else:
-                stats.average_processing_time = (
-                    (stats.average_processing_time * (stats.total_predictions - 1) + processing_time) 
-                    / stats.total_predictions
-                )
-            
-            # Update nutrition search statistics
-            stats.total_nutrition_searches += 1
-            if data_source not in ['default_fallback', 'mock_data']:
-                stats.successful_nutrition_searches += 1
-            
-            # Calculate accuracy rate (will be updated by feedback)
-            if stats.total_predictions > 0:
-                stats.accuracy_rate = (stats.correct_predictions / stats.total_predictions) * 100
-            
-            stats.save()
+            today = timezone.now().date()
+            if not self._increment_system_statistics(today, confidence, processing_time, data_source):
+                # First analysis of the day creates the row
+                with transaction.atomic():
+                    SystemStatistics.objects.get_or_create(date=today)
+                self._increment_system_statistics(today, confidence, processing_time, data_source)
             
         except Exception as e:
             logger.error(f"Error updating system statistics: {e}")
     
+    @staticmethod
+    def _increment_system_statistics(date, confidence, processing_time, data_source):
+        """Count one analysis in a single UPDATE, returning the number of rows updated"""
+        # 'low' / 'medium' / 'high', the prefix of the bucket's counter columns
+        bucket = FoodAnalysisSerializer._get_confidence_level(confidence)
+        # 'fallback' means no lookup ran: the guess was too unsure to look up, or the lookup raised
+        searched = 0 if data_source == 'fallback' else 1
+        succeeded = 0 if data_source in ('fallback', 'default_fallback', 'mock_data') else 1
+        
+        total = F('total_predictions') + 1
+        bucket_predictions = F(f'{bucket}_confidence_predictions') + 1
+        searches = F('total_nutrition_searches') + searched
+        successes = F('successful_nutrition_searches') + succeeded
+        
+        # Every SET expression sees the row as it was, so the derived rates (normally refreshed
+        # in save()) are computed from the incremented counters explicitly
+        return SystemStatistics.objects.filter(date=date).update(
+            total_predictions=total,
+            average_processing_time=ExpressionWrapper(
+                (F('average_processing_time') * F('total_predictions') + processing_time) / total,
+                output_field=FloatField()
+            ),
+            accuracy_rate=_percentage(F('correct_predictions'), total),
+            total_nutrition_searches=searches,
+            successful_nutrition_searches=successes,
+            nutrition_search_success_rate=_percentage(successes, searches),
+            last_updated=timezone.now(),
+            **{
+                f'{bucket}_confidence_predictions': bucket_predictions,
+                f'{bucket}_confidence_accuracy': _percentage(
+                    F(f'{bucket}_confidence_correct'), bucket_predictions
+                ),
+            }
+        )
+    
     def _update_food_database_stats(self, food_name):
         """Update food database search statistics"""
-        try:
-            food_entry, created = FoodDatabase.objects.get_or_create(
-                food_name=food_name.lower().strip(),
-                defaults={
-                    'search_count': 0,
-                    'data_source': 'detection',
-                    'category': 'detected',
-                }
-            )
-            
-            food_entry.search_count += 1
-            food_entry.last_searched = timezone.now()
-            food_entry.save()
-            
-        except Exception as e:
-            logger.error(f"Error updating food database stats: {e}")
+        _record_food_search(food_name.lower().strip())
     
     def _get_fallback_nutrition(self):
         """Provide fallback nutrition data"""
-        return {
-            'calories': 200,
-            'protein': 10,
-            'fat': 8,
-            'carbs': 25,
-            'fiber': 2,
-            'sugar': 5,
-            'sodium': 100,
-            'source': 'fallback'
-        }
+        return FALLBACK_NUTRITION
     
     def _create_manual_response(self, food_name, confidence, nutrition_data, processing_time):
         """Create manual response when database save fails"""
@@ -294,12 +357,7 @@ class AnalyzeFoodView(APIView):
     
     def _get_confidence_level(self, confidence):
         """Get confidence level description"""
-        if confidence >= 80:
-            return 'high'
-        elif confidence >= 60:
-            return 'medium'
-        else:
-            return 'low'
+        return FoodAnalysisSerializer._get_confidence_level(confidence)
 
 
 class FeedbackView(APIView):
@@ -369,38 +427,42 @@ class FeedbackView(APIView):
     def _update_statistics_from_feedback(self, feedback):
         """Update system statistics based on user feedback"""
         try:
-            stats, created = SystemStatistics.objects.get_or_create(
-                date=timezone.now().date(),
-                defaults={'total_predictions': 0, 'correct_predictions': 0}
-            )
-            
-            # Update based on feedback type
-            if feedback.feedback_type in ['perfect', 'confirmation']:
-                # User confirmed the prediction was correct
-                stats.correct_predictions += 1
-                stats.total_confirmations += 1
-                
-                # Update confidence-based accuracy
-                confidence = feedback.original_confidence
-                if confidence >= 80:
-                    stats.high_confidence_correct += 1
-                elif confidence >= 60:
-                    stats.medium_confidence_correct += 1
-                else:
-                    stats.low_confidence_correct += 1
-                    
-            elif feedback.feedback_type in ['correction', 'wrong']:
-                # User corrected the prediction
-                stats.total_corrections += 1
-            
-            # Recalculate accuracy rate
-            if stats.total_predictions > 0:
-                stats.accuracy_rate = (stats.correct_predictions / stats.total_predictions) * 100
-            
-            stats.save()
+            today = timezone.now().date()
+            if not self._increment_feedback_statistics(today, feedback):
+                # First feedback of the day may arrive before any analysis has created the row
+                with transaction.atomic():
+                    SystemStatistics.objects.get_or_create(date=today)
+                self._increment_feedback_statistics(today, feedback)
             
         except Exception as e:
             logger.error(f"Error updating statistics from feedback: {e}")
+    
+    @staticmethod
+    def _increment_feedback_statistics(date, feedback):
+        """Count one feedback in a single UPDATE, returning the number of rows updated"""
+        # Only the feedback counters are written, so analyses counted meanwhile by the
+        # statistics worker are never overwritten with a stale copy of the row
+        if feedback.feedback_type in ['perfect', 'confirmation']:
+            # User confirmed the prediction was correct
+            bucket = FoodAnalysisSerializer._get_confidence_level(feedback.original_confidence)
+            correct = F('correct_predictions') + 1
+            bucket_correct = F(f'{bucket}_confidence_correct') + 1
+            counters = {
+                'correct_predictions': correct,
+                'total_confirmations': F('total_confirmations') + 1,
+                'accuracy_rate': _percentage(correct, F('total_predictions')),
+                f'{bucket}_confidence_correct': bucket_correct,
+                f'{bucket}_confidence_accuracy': _percentage(
+                    bucket_correct, F(f'{bucket}_confidence_predictions')
+                ),
+            }
+        elif feedback.feedback_type in ['correction', 'wrong']:
+            # User corrected the prediction
+            counters = {'total_corrections': F('total_corrections') + 1}
+        else:
+            counters = {}
+        
+        return SystemStatistics.objects.filter(date=date).update(last_updated=timezone.now(), **counters)
 
 
 class SystemStatsView(APIView):
@@ -459,22 +521,29 @@ class FoodDatabaseView(APIView):
             queryset = FoodDatabase.objects.all()
             
             if search:
+                # Substring match on every backend; on PostgreSQL both sides are served by the
+                # fooddb_name_trgm / fooddb_altnames_trgm indexes
                 queryset = queryset.filter(
-                    Q(food_name__icontains=search) |
-                    Q(alternative_names__icontains=search)
+                    Q(food_name__icontains=search) | Q(alternative_names__icontains=search)
                 )
             
             if category:
                 queryset = queryset.filter(category=category)
             
+            # Keyset pagination on the unique, default-ordered food_name: ?after=<last name seen>
+            after = request.GET.get('after')
+            if after:
+                queryset = queryset.filter(food_name__gt=after)
+            
             # Limit results
-            queryset = queryset[:limit]
+            foods = list(queryset[:limit])
             
-            serializer = FoodDatabaseSerializer(queryset, many=True)
+            serializer = FoodDatabaseSerializer(foods, many=True)
             
             return Response({
                 'count': len(serializer.data),
-                'foods': serializer.data
+                'foods': serializer.data,
+                'next_after': foods[-1].food_name if len(foods) == limit else None
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -513,7 +582,10 @@ class DetailedAnalysisView(APIView):
     
     def get(self, request, analysis_id):
         try:
-            food_analysis = FoodAnalysis.objects.get(id=analysis_id)
+            # Newest first, so the serializer can take latest_feedback from the head of the list
+            food_analysis = FoodAnalysis.objects.prefetch_related(
+                Prefetch('feedbacks', queryset=UserFeedback.objects.order_by('-created_at'))
+            ).get(id=analysis_id)
             serializer = DetailedAnalysisSerializer(food_analysis)
             
             # Add additional analysis data
@@ -563,22 +635,49 @@ class RecentAnalysisView(APIView):
             limit = int(request.GET.get('limit', 20))
             user_only = request.GET.get('user_only', 'false').lower() == 'true'
             
-            # Build query
-            queryset = FoodAnalysis.objects.all()
+            # Build query (only the columns the serializer reads)
+            queryset = FoodAnalysis.objects.only(*FOOD_ANALYSIS_COLUMNS)
             
             # Filter by user if requested and authenticated
             if user_only and request.user.is_authenticated:
                 # If you add user field to FoodAnalysis model in future
                 pass
             
+            # Keyset pagination: ?before=<created_at>,<id> of the last row seen walks the created_at
+            # index; id breaks ties between analyses saved in the same microsecond
+            queryset = queryset.order_by('-created_at', '-id')
+            before = request.GET.get('before')
+            if before:
+                cursor = self._parse_cursor(before)
+                if cursor is None:
+                    return Response(
+                        {'error': 'before must be a next_before cursor (ISO 8601 timestamp[,id])'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                created_at, analysis_id = cursor
+                if analysis_id is None:
+                    queryset = queryset.filter(created_at__lt=created_at)
+                else:
+                    queryset = queryset.filter(
+                        Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=analysis_id)
+                    )
+            
             # Get recent analyses
-            recent_analyses = queryset[:limit]
+            recent_analyses = list(queryset[:limit])
             
             serializer = FoodAnalysisSerializer(recent_analyses, many=True, context={'request': request})
             
+            next_before = None
+            if len(recent_analyses) == limit:
+                last = recent_analyses[-1]
+                # UTC with 'Z' so the cursor survives a query string without escaping '+'
+                created_at = last.created_at.astimezone(dt_timezone.utc).isoformat().replace('+00:00', 'Z')
+                next_before = f'{created_at},{last.id}'
+            
             return Response({
                 'count': len(serializer.data),
-                'analyses': serializer.data
+                'analyses': serializer.data,
+                'next_before': next_before
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -587,69 +686,121 @@ class RecentAnalysisView(APIView):
                 {'error': f'Failed to fetch recent analyses: {str(e)}'}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+    
+    @staticmethod
+    def _parse_cursor(value):
+        """(created_at, id or None) from a next_before cursor, or None if it's malformed"""
+        timestamp, _, analysis_id = value.partition(',')
+        created_at = parse_datetime(timestamp)
+        if created_at is None:
+            return None
+        if timezone.is_naive(created_at):
+            created_at = timezone.make_aware(created_at)
+        if not analysis_id:
+            return created_at, None
+        try:
+            return created_at, uuid.UUID(analysis_id)
+        except ValueError:
+            return None
+
+
+# Readiness probes fire every few seconds; serve the composite check from memory in between.
+# Process-local on purpose: each worker reports its own models, even with a shared cache backend.
+HEALTH_CACHE_TTL = 5  # seconds
+_health_cache = None  # (expires_at, health_status)
+
+
+class LivenessView(APIView):
+    """Liveness probe: the process is up and serving; touches neither models nor the database"""
+    permission_classes = []
+    
+    def get(self, request):
+        return Response({'status': 'ok'}, status=status.HTTP_200_OK)
 
 
 class HealthView(APIView):
     """Enhanced health check endpoint with system status"""
     permission_classes = []
+    # Status code when the models or the database are down; the readiness probe fails instead
+    unavailable_status = status.HTTP_200_OK
 
     def get(self, request):
-        try:
-            # Basic health check
-            health_status = {
-                'status': 'ok',
-                'timestamp': timezone.now().isoformat(),
-                'version': '2.0.0',
-                'service': 'Enhanced Food Detection API'
-            }
-            
-            # Check model availability
-            try:
-                detector = EnhancedFoodDetector()
-                health_status['models'] = {
-                    'available': list(detector.models.keys()),
-                    'count': len(detector.models),
-                    'status': 'loaded'
-                }
-            except Exception as e:
-                health_status['models'] = {
-                    'available': [],
-                    'count': 0,
-                    'status': 'error',
-                    'error': str(e)
-                }
-            
-            # Check database connectivity
-            try:
-                total_analyses = FoodAnalysis.objects.count()
-                health_status['database'] = {
-                    'status': 'connected',
-                    'total_analyses': total_analyses
-                }
-            except Exception as e:
-                health_status['database'] = {
-                    'status': 'error',
-                    'error': str(e)
-                }
-            
-            # Check nutrition API
+        global _health_cache
+        cached = _health_cache
+        if cached is None or cached[0] <= time.monotonic():
             try:
-                nutrition_api = EnhancedNutritionAPI()
-                health_status['nutrition_api'] = {
-                    'status': 'available',
-                    'sources': ['USDA', 'OpenFoodFacts', 'Google Search']
-                }
+                cached = _health_cache = (time.monotonic() + HEALTH_CACHE_TTL, self._check())
             except Exception as e:
-                health_status['nutrition_api'] = {
+                return Response({
                     'status': 'error',
-                    'error': str(e)
-                }
-            
+                    'error': str(e),
+                    'timestamp': timezone.now().isoformat()
+                }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        
+        health_status = cached[1]
+        if health_status['status'] == 'ok':
             return Response(health_status, status=status.HTTP_200_OK)
-            
+        return Response(health_status, status=self.unavailable_status)
+    
+    def _check(self):
+        """Run the model, database and nutrition API checks"""
+        # Basic health check
+        health_status = {
+            'status': 'ok',
+            'timestamp': timezone.now().isoformat(),
+            'version': '2.0.0',
+            'service': 'Enhanced Food Detection API'
+        }
+        
+        # Check model availability
+        try:
+            detector = get_detector()
+            health_status['models'] = {
+                'available': list(detector.models.keys()),
+                'count': len(detector.models),
+                'status': 'loaded'
+            }
         except Exception as e:
-            return Response({
+            health_status['models'] = {
+                'available': [],
+                'count': 0,
                 'status': 'error',
-                'error': str(e),
-                'timestamp': timezone.now().isoformat()
-            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
\ No newline at end of file
+                'error': str(e)
+            }
+        
+        # Check database connectivity
+        try:
+            total_analyses = FoodAnalysis.objects.count()
+            health_status['database'] = {
+                'status': 'connected',
+                'total_analyses': total_analyses
+            }
+        except Exception as e:
+            health_status['database'] = {
+                'status': 'error',
+                'error': str(e)
+            }
+        
+        # Check nutrition API
+        try:
+            nutrition_api = get_nutrition_api()
+            health_status['nutrition_api'] = {
+                'status': 'available',
+                'sources': nutrition_api.source_names()
+            }
+        except Exception as e:
+            health_status['nutrition_api'] = {
+                'status': 'error',
+                'error': str(e)
+            }
+        
+        # The API can't serve analyses without its models and database
+        if 'error' in (health_status['models']['status'], health_status['database']['status']):
+            health_status['status'] = 'degraded'
+        
+        return health_status
+
+
+class ReadinessView(HealthView):
+    """Readiness probe: the full health check, failing with 503 when the models or database are down"""
+    unavailable_status = status.HTTP_503_SERVICE_UNAVAILABLE